@@ -1,7 +1,9 @@
 import streamlit as st
 import json
 from pymongo import MongoClient
-from datetime import datetime
+from datetime import datetime, timezone
+import bulk_upload
+import qa_schema
 
 # --- MongoDB setup using Streamlit Secrets ---
 MONGO_URI = st.secrets["mongo_uri"]
@@ -13,41 +15,73 @@ collection = db["QA_pairs"]
 st.set_page_config(page_title="Q&A Uploader", layout="centered")
 st.title("💬 Q&A Uploader")
 
-input_json = st.text_area("Paste the full Q&A JSON", height=400, help="Ensure it includes 'content_id', 'metadata', and 'questions'.")
+mode = st.radio("Mode", ["Single JSON", "Bulk file (JSONL / JSON array / ZIP)"], horizontal=True)
 overwrite = st.checkbox("🔁 Overwrite if Content ID already exists", value=False)
 
+if mode != "Single JSON":
+    kind = st.radio("Collection", ["qa", "content"], horizontal=True,
+                    format_func=lambda k: bulk_upload.KINDS[k][0])
+    target, validate = bulk_upload.KINDS[kind]
+    files = st.file_uploader(
+        f"Upload {target} files", type=["jsonl", "ndjson", "json", "zip"], accept_multiple_files=True,
+        help="One document per line (JSONL), a JSON array of documents, or a ZIP of such files."
+    )
+    if files and st.button("Upload All"):
+        def all_records():
+            for f in files:
+                yield from bulk_upload.iter_records(f.name, f)
+
+        with st.spinner("Uploading…"):
+            bulk_upload.ensure_indexes(db[target])
+            report, stats = bulk_upload.bulk_upload(db[target], all_records(), overwrite, validate=validate)
+
+        counts = stats["counts"]
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Inserted", counts.get("inserted", 0))
+        m2.metric("Updated" if overwrite else "Already existed", counts.get("updated" if overwrite else "exists", 0))
+        m3.metric("Unchanged", counts.get("unchanged", 0))
+        m4.metric("Rejected", counts.get("invalid", 0) + counts.get("error", 0))
+        m5.metric("Docs/s", stats["docs_per_s"])
+        st.caption(f"{stats['records']} records in {stats['seconds']}s")
+
+        problems = [r for r in report if r["status"] in ("invalid", "error")]
+        if problems:
+            st.error(f"❌ {len(problems)} records were not uploaded")
+            st.dataframe(problems, use_container_width=True)
+        st.download_button(
+            "⬇️ Download per-record report",
+            data="\n".join(json.dumps(r, ensure_ascii=False, default=str) for r in report),
+            file_name="upload_report.jsonl",
+            mime="application/jsonl"
+        )
+    st.stop()
+
+input_json = st.text_area("Paste the full Q&A JSON", height=400, help="Ensure it includes 'content_id', 'metadata', and 'questions'.")
+
 if st.button("Upload Q&A"):
     try:
-        data = json.loads(input_json)
-
-        # Validate required keys
-        required_keys = {"content_id", "metadata", "questions"}
-        if not required_keys.issubset(data.keys()):
-            st.error("❌ JSON must include: 'content_id', 'metadata', and 'questions'.")
+        data, errors = qa_schema.validate(json.loads(input_json))
+        if errors:
+            st.error("❌ The Q&A JSON does not match the expected schema:")
+            st.code("\n".join(errors), language=None)
         else:
-            # Normalize content_id
             content_id = data["content_id"]
-            if isinstance(content_id, str) and content_id.isdigit():
-                content_id = int(content_id)
-            data["content_id"] = content_id
-            data["uploaded_at"] = datetime.utcnow()
-
-            if overwrite:
-                result = collection.update_one(
-                    {"content_id": content_id},
-                    {"$set": data},
-                    upsert=True
-                )
-                if result.matched_count:
-                    st.success(f"♻️ Overwritten existing Q&A for Content ID {content_id}")
-                else:
-                    st.success(f"✅ New Q&A inserted for Content ID {content_id}")
+            data[bulk_upload.HASH_FIELD] = bulk_upload.content_hash(data)
+            data["uploaded_at"] = datetime.now(timezone.utc)
+            row = {"ref": "pasted", "content_id": content_id, "status": None, "error": None}
+            bulk_upload.write_batch(collection, [(row, data)], overwrite)
+
+            status = row["status"]
+            if status == "unchanged":
+                st.info(f"⏭️ Q&A for Content ID {content_id} is identical to the stored one; nothing written.")
+            elif status == "exists":
+                st.warning(f"⚠️ Q&A for Content ID {content_id} already exists.")
+            elif status == "updated":
+                st.success(f"♻️ Overwritten existing Q&A for Content ID {content_id}")
+            elif status == "inserted":
+                st.success(f"✅ Q&A for Content ID {content_id} uploaded successfully!")
             else:
-                if collection.find_one({"content_id": content_id}):
-                    st.warning(f"⚠️ Q&A for Content ID {content_id} already exists.")
-                else:
-                    collection.insert_one(data)
-                    st.success(f"✅ Q&A for Content ID {content_id} uploaded successfully!")
+                st.error(f"❌ Error: {row['error']}")
     except json.JSONDecodeError:
         st.error("❌ Invalid JSON! Please check your formatting.")
     except Exception as e:
@@ -0,0 +1,181 @@
+from pymongo import MongoClient, UpdateOne
+import streamlit as st
+
+# judgment label -> counter field on a qa_agreement row
+CATEGORY_FIELDS = {"Correct": "correct", "Incorrect": "incorrect", "Doubt": "doubt"}
+
+
+def ensure_indexes(db):
+    db["qa_agreement"].create_index([("content_id", 1), ("qa_index", 1)], unique=True)
+    db["qa_agreement"].create_index([("updated_at", -1)])
+    # kappa_table filters on {"n": 5, "doubt": 0}
+    db["qa_agreement"].create_index([("n", 1), ("doubt", 1)])
+
+
+def derived_fields():
+    """
+    $set stage deriving n, single-item Fleiss' kappa and majority from the
+    Correct/Incorrect counters. Matches the dashboards' statsmodels call on a
+    1×2 matrix: unanimous -> 1.0, fewer than 2 confident raters -> null,
+    ties resolve to "Incorrect".
+    """
+    c, i = "$correct", "$incorrect"
+    n = {"$add": [c, i]}
+    sq = {"$add": [{"$multiply": [c, c]}, {"$multiply": [i, i]}]}
+    p_bar = {"$divide": [{"$subtract": [sq, n]}, {"$multiply": [n, {"$subtract": [n, 1]}]}]}
+    p_e = {"$divide": [sq, {"$multiply": [n, n]}]}
+    return {"$set": {
+        "n": n,
+        "kappa": {"$cond": [
+            {"$lt": [n, 2]}, None,
+            {"$cond": [
+                {"$or": [{"$eq": [c, 0]}, {"$eq": [i, 0]}]}, 1.0,
+                {"$divide": [{"$subtract": [p_bar, p_e]}, {"$subtract": [1, p_e]}]}
+            ]}
+        ]},
+        "majority": {"$cond": [
+            {"$eq": [n, 0]}, None,
+            {"$cond": [{"$gt": [c, i]}, "Correct", "Incorrect"]}
+        ]},
+        "updated_at": "$$NOW"
+    }}
+
+
+def agreement_ops(cid, intern_id, entries, expected=None):
+    """
+    qa_agreement write ops for judgments that were *newly* stored: bump the
+    matching counter, record the rater, then re-derive kappa/majority.
+    Only pass entries whose audit/doubt upsert actually inserted, so a replay
+    never double-counts.
+    With `expected` ({qa_index: counters} read earlier), a row that existed
+    then is only bumped if its counters are unchanged; a miss shows up as a
+    short matched_count (see persist_submission).
+    """
+    ops = []
+    for entry in entries:
+        key = {"content_id": cid, "qa_index": entry["qa_index"]}
+        inc = {f: 0 for f in CATEGORY_FIELDS.values()}
+        inc[CATEGORY_FIELDS[entry["judgment"]]] = 1
+        guard = (expected or {}).get(entry["qa_index"])
+        ops.append(UpdateOne(
+            {**key, **guard} if guard else key,
+            {"$inc": inc, "$addToSet": {"raters": intern_id}},
+            upsert=not guard
+        ))
+        ops.append(UpdateOne(key, [derived_fields()]))
+    return ops
+
+
+def retraction_ops(cid, intern_id, entries):
+    """
+    Inverse of agreement_ops: take already counted judgments back out of
+    qa_agreement (used when anomalies.py excludes a flagged submission).
+    """
+    ops = []
+    for entry in entries:
+        key = {"content_id": cid, "qa_index": entry["qa_index"]}
+        dec = {f: 0 for f in CATEGORY_FIELDS.values()}
+        dec[CATEGORY_FIELDS[entry["judgment"]]] = -1
+        ops.append(UpdateOne(key, {"$inc": dec, "$pull": {"raters": intern_id}}))
+        ops.append(UpdateOne(key, [derived_fields()]))
+    return ops
+
+
+def backfill_needed(db, compact=False):
+    """
+    True when the oldest stored judgment has no qa_agreement row, i.e. the
+    table only covers judgments made since the submit path started writing
+    it (or is empty) and rebuild_qa_agreement has not been run yet.
+    """
+    if compact:
+        oldest = db["audit_submissions"].find_one(
+            {"judgments.0": {"$exists": True}}, {"content_id": 1, "judgments": 1}, sort=[("_id", 1)]
+        )
+        key = oldest and {"content_id": oldest["content_id"], "qa_index": oldest["judgments"][0]["qa_index"]}
+    else:
+        oldest = db["audit_logs"].find_one({"judgment": {"$ne": None}}, {"content_id": 1, "qa_index": 1}, sort=[("_id", 1)])
+        key = oldest and {"content_id": oldest["content_id"], "qa_index": oldest["qa_index"]}
+    return bool(key) and db["qa_agreement"].find_one(key, {"_id": 1}) is None
+
+
+def rebuild_qa_agreement(db, compact=False, exclude_flagged=False):
+    """
+    Recompute every qa_agreement row from audit_logs + doubt_logs (or from
+    audit_submissions when compact=True) on the server. Used for the initial
+    backfill and as a repair tool. With exclude_flagged, judgments from
+    submissions excluded by anomalies.py stay out.
+    """
+    ensure_indexes(db)
+
+    def count_of(label):
+        return {"$sum": {"$cond": [{"$eq": ["$judgment", label]}, 1, 0]}}
+
+    if compact:
+        source = "audit_submissions"
+        judgments = [
+            {"$unwind": "$judgments"},
+            {"$project": {
+                "content_id": 1,
+                "intern_id": 1,
+                "qa_index": "$judgments.qa_index",
+                "judgment": "$judgments.judgment"
+            }}
+        ]
+    else:
+        source = "audit_logs"
+        judgments = [
+            {"$match": {"judgment": {"$in": ["Correct", "Incorrect"]}}},
+            {"$unionWith": {"coll": "doubt_logs", "pipeline": [{"$match": {"judgment": "Doubt"}}]}},
+        ]
+
+    if exclude_flagged:
+        judgments += [
+            {"$lookup": {
+                "from": "submission_flags",
+                "let": {"c": "$content_id", "i": "$intern_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$intern_id", "$$i"]},
+                        {"$eq": ["$content_id", "$$c"]}
+                    ]}}},
+                    {"$match": {"excluded": True}},
+                    {"$project": {"_id": 1}}
+                ],
+                "as": "excluded"
+            }},
+            {"$match": {"excluded": []}},
+        ]
+
+    pipeline = judgments + [
+        {"$group": {
+            "_id": {"content_id": "$content_id", "qa_index": "$qa_index"},
+            **{field: count_of(label) for label, field in CATEGORY_FIELDS.items()},
+            "raters": {"$addToSet": "$intern_id"}
+        }},
+        {"$project": {
+            "_id": 0,
+            "content_id": "$_id.content_id",
+            "qa_index": "$_id.qa_index",
+            **{field: 1 for field in CATEGORY_FIELDS.values()},
+            "raters": 1
+        }},
+        derived_fields(),
+        {"$merge": {
+            "into": "qa_agreement",
+            "on": ["content_id", "qa_index"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert"
+        }}
+    ]
+    db[source].aggregate(pipeline, allowDiskUse=True)
+
+
+if __name__ == "__main__":
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+    rebuild_qa_agreement(
+        db,
+        compact=st.secrets.get("audit_schema", "per_pair") == "compact",
+        exclude_flagged=st.secrets.get("exclude_flagged", False)
+    )
+    print(f"qa_agreement rebuilt: {db['qa_agreement'].estimated_document_count()} rows")
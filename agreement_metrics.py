@@ -0,0 +1,159 @@
+import numpy as np
+
+# Pure-NumPy agreement kernels. No Mongo / Streamlit imports so they can be
+# used from dashboards, batch jobs and benchmarks alike.
+
+
+def per_item_fleiss_kappa(counts):
+    """
+    Fleiss' kappa of every item evaluated on its own, for a dense
+    (items × categories) count matrix — one pass, no Python loop.
+
+    Row-for-row identical to what the dashboards did per QA pair:
+    statsmodels.fleiss_kappa(np.array([row])), with the NaN that a unanimous
+    row produces replaced by 1.0. Rows with fewer than 2 ratings stay NaN.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    n = counts.sum(axis=1)
+    sq = (counts ** 2).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_i = (sq - n) / (n * (n - 1))
+        p_e = sq / (n * n)
+        kappa = (p_i - p_e) / (1 - p_e)
+    unanimous = (n >= 2) & (counts.max(axis=1) == n)
+    kappa[unanimous] = 1.0
+    kappa[n < 2] = np.nan
+    return kappa
+
+
+def item_agreement(counts):
+    """
+    Observed pairwise agreement P_i per item (the fraction of rater pairs
+    that agree). NaN for items with fewer than 2 ratings.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    n = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return ((counts ** 2).sum(axis=1) - n) / (n * (n - 1))
+
+
+def fleiss_kappa(counts):
+    """
+    Corpus-level Fleiss' kappa over all items at once. Equal to
+    statsmodels.fleiss_kappa(counts) when every item has the same number of
+    ratings; items with fewer than 2 ratings are ignored.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    n = counts.sum(axis=1)
+    counts = counts[n >= 2]
+    if not len(counts):
+        return np.nan
+    p_bar = item_agreement(counts).mean()
+    p_j = counts.sum(axis=0) / counts.sum()
+    p_e = (p_j ** 2).sum()
+    if p_e == 1:
+        return np.nan
+    return (p_bar - p_e) / (1 - p_e)
+
+
+def majority_index(counts):
+    """
+    Column index of the most frequent category per item. Ties go to the
+    right-most tied column, so for [Correct, Incorrect] a tie is "Incorrect",
+    as in the dashboards' `"Correct" if c > i else "Incorrect"`.
+    """
+    counts = np.asarray(counts)
+    k = counts.shape[1]
+    return k - 1 - np.argmax(counts[:, ::-1], axis=1)
+
+
+def item_category_counts(items, values, n_items=None, n_categories=None):
+    """
+    Dense (items × categories) count matrix from sparse judgment triples
+    given as parallel integer arrays (item code, category code).
+    """
+    items = np.asarray(items, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    n_items = int(items.max()) + 1 if n_items is None else n_items
+    n_categories = int(values.max()) + 1 if n_categories is None else n_categories
+    flat = np.bincount(items * n_categories + values, minlength=n_items * n_categories)
+    return flat.reshape(n_items, n_categories).astype(np.float64)
+
+
+def coincidence_matrix(counts):
+    """
+    Krippendorff's coincidence matrix o_ck for nominal data. Each item with
+    m >= 2 ratings contributes n_c·n_k / (m - 1) (minus the self-pairs on
+    the diagonal); items with a single rating are unpairable and drop out.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    m = counts.sum(axis=1)
+    counts = counts[m >= 2]
+    weighted = counts / (m[m >= 2] - 1)[:, None]
+    return weighted.T @ counts - np.diag(weighted.sum(axis=0))
+
+
+def krippendorff_alpha(counts):
+    """
+    Nominal Krippendorff's alpha from an (items × categories) count matrix.
+    Unlike Fleiss' kappa, items may have any number of raters (missing
+    ratings are simply absent), so partially audited pairs and 3-rater
+    medium/long items all count. NaN when there is no pairable data or no
+    variation at all.
+    """
+    o = coincidence_matrix(counts)
+    n_c = o.sum(axis=1)
+    n = n_c.sum()
+    if n <= 1:
+        return np.nan
+    d_o = (n - np.trace(o)) / n
+    d_e = (n * n - (n_c ** 2).sum()) / (n * (n - 1))
+    if d_e == 0:
+        return np.nan
+    return 1 - d_o / d_e
+
+
+def rater_contributions(items, raters, values, n_categories=None):
+    """
+    Per-rater breakdown of nominal Krippendorff's alpha for judgment triples
+    (item code, rater code, category code), one rating per rater and item.
+
+    Returns a dict of arrays indexed by rater code:
+      judgments       pairable ratings (items with >= 2 ratings)
+      disagreement    share of each rating's co-raters that chose differently
+                      — the rater's own observed disagreement D_o
+      share           fraction of the corpus' total disagreement mass
+      alpha_without   corpus alpha with this rater's ratings removed
+    """
+    items = np.asarray(items, dtype=np.int64)
+    raters = np.asarray(raters, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    n_items = int(items.max()) + 1
+    n_raters = int(raters.max()) + 1
+    n_categories = int(values.max()) + 1 if n_categories is None else n_categories
+
+    counts = item_category_counts(items, values, n_items, n_categories)
+    m = counts.sum(axis=1)[items]
+    same = counts[items, values]
+    pairable = m >= 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mass = np.where(pairable, (m - same) / (m - 1), 0.0)
+
+    judgments = np.bincount(raters, weights=pairable, minlength=n_raters)
+    total = np.bincount(raters, weights=mass, minlength=n_raters)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        disagreement = total / judgments
+        share = total / mass.sum()
+
+    alpha_without = np.full(n_raters, np.nan)
+    for r in range(n_raters):
+        own = raters == r
+        without = counts - item_category_counts(items[own], values[own], n_items, n_categories)
+        alpha_without[r] = krippendorff_alpha(without)
+
+    return {
+        "judgments": judgments.astype(np.int64),
+        "disagreement": disagreement,
+        "share": share,
+        "alpha_without": alpha_without,
+    }
@@ -0,0 +1,634 @@
+import streamlit as st
+from pymongo import MongoClient
+import numpy as np
+import threading
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+import daily_quality
+from compact_audits import SUBMISSIONS, QA_LOOKUP_INDEX
+from agreement_metrics import (
+    per_item_fleiss_kappa, fleiss_kappa, majority_index,
+    item_category_counts, krippendorff_alpha, rater_contributions
+)
+
+# Dashboard data layer shared by admin_dashboard.py and dasboard.py.
+# Everything heavy runs server-side; results are cached process-wide by a
+# cheap data version, so every open tab shares one computation and it is
+# only redone when the underlying collection changes.
+# pandas is imported inside the functions that build frames, so pages that
+# only render a stored snapshot never pay for it.
+
+AUDITOR_INDEX = [("content_id", 1), ("intern_id", 1)]
+
+# shared_result entries kept per process, least recently used evicted first;
+# keys include window bounds, which move every day and per custom range
+RESULT_CACHE_SIZE = 64
+
+# the notebooks report in IST; the dashboards default to the same
+TIMEZONES = {"IST (Asia/Kolkata)": "Asia/Kolkata", "UTC": "UTC"}
+
+# preset dashboard windows: label -> whole days back from today (None = all time)
+WINDOWS = {"All time": None, "Today": 0, "Last 7 days": 6, "Last 30 days": 29}
+
+
+@st.cache_resource
+def get_db():
+    """
+    One MongoClient per process for all dashboard sessions (instead of a new
+    client on every rerun); indexes are ensured once on first use.
+    """
+    client = MongoClient(st.secrets["mongo_uri"], serverSelectionTimeoutMS=5000)
+    db = client["Tel_QA"]
+    ensure_indexes(db)
+    return db
+
+
+@st.cache_resource
+def _result_cache():
+    """
+    Process-wide store behind shared_result: {key: (version, value)} in LRU
+    order plus a lock per key.
+    """
+    return {"values": OrderedDict(), "locks": {}, "guard": threading.Lock()}
+
+
+def shared_result(key, version, compute):
+    """
+    compute() computed at most once per `version` for the whole process.
+    Concurrent callers with the same key wait on the first one instead of
+    recomputing (single flight); only the newest version per key is kept,
+    for at most RESULT_CACHE_SIZE keys.
+    The value is shared, not copied — callers must treat it as read-only.
+    """
+    cache = _result_cache()
+    values, locks = cache["values"], cache["locks"]
+    with cache["guard"]:
+        lock = locks.setdefault(key, threading.Lock())
+    with lock:
+        with cache["guard"]:
+            hit = values.get(key)
+            if hit is not None and hit[0] == version:
+                values.move_to_end(key)
+                return hit[1]
+        value = compute()
+        with cache["guard"]:
+            values[key] = (version, value)
+            values.move_to_end(key)
+            while len(values) > RESULT_CACHE_SIZE:
+                values.popitem(last=False)
+            # drop the locks of evicted (or failed) keys nobody is waiting on
+            for stale in [k for k, l in locks.items() if k not in values and k != key and not l.locked()]:
+                del locks[stale]
+        return value
+
+
+@st.cache_resource
+def audit_schema():
+    """
+    "per_pair" or "compact": the audit_schema secret app_working.py writes
+    with. Without a secrets file (tests, benchmarks) it is per_pair.
+    """
+    try:
+        return st.secrets.get("audit_schema", "per_pair")
+    except FileNotFoundError:
+        return "per_pair"
+
+
+def judgment_sources(db):
+    """
+    (audit, doubt) collections with one row per judged QA pair. In compact
+    mode those rows only exist as the compat views over audit_submissions.
+    """
+    if audit_schema() == "compact":
+        return db["audit_logs_compat"], db["doubt_logs_compat"]
+    return db["audit_logs"], db["doubt_logs"]
+
+
+def judgment_versions(db):
+    """
+    (audit, doubt) data versions. Views have no index to probe, so in
+    compact mode both come from audit_submissions, which every submission
+    (judgments and doubts alike) is written to.
+    """
+    if audit_schema() == "compact":
+        version = data_version(db[SUBMISSIONS])
+        return version, version
+    return data_version(db["audit_logs"]), data_version(db["doubt_logs"])
+
+
+def ensure_indexes(db):
+    db["audit_logs"].create_index(AUDITOR_INDEX)
+    db["audit_logs"].create_index([("timestamp", 1)])
+    db["medium_long_audits"].create_index([("timestamp", 1)])
+    # compat views join every submission back to QA_pairs by content_id
+    db["QA_pairs"].create_index(QA_LOOKUP_INDEX)
+    # keyset pagination of the doubt panel (paging.py): sort key + filters
+    db["doubt_logs"].create_index([("timestamp", 1), ("_id", 1)])
+    db["doubt_logs"].create_index([("intern_id", 1), ("timestamp", 1), ("_id", 1)])
+    db["doubt_logs"].create_index([("content_id", 1), ("timestamp", 1), ("_id", 1)])
+
+
+def window_bounds(label, tz="Asia/Kolkata", today=None):
+    """
+    (start, None) for a WINDOWS preset, starting at local midnight in `tz` so
+    the window — and every cache key built from it — stays fixed all day.
+    """
+    days = WINDOWS[label]
+    if days is None:
+        return None
+    zone = ZoneInfo(tz)
+    today = today or datetime.now(zone).date()
+    return (datetime.combine(today - timedelta(days=days), time.min, zone), None)
+
+
+def date_window(start_date, end_date, tz="Asia/Kolkata"):
+    """
+    (start, end) covering the calendar days start_date..end_date inclusive in `tz`.
+    """
+    zone = ZoneInfo(tz)
+    return (
+        datetime.combine(start_date, time.min, zone),
+        datetime.combine(end_date + timedelta(days=1), time.min, zone),
+    )
+
+
+def window_match(window, field="timestamp"):
+    """
+    Query fragment restricting `field` to window = (start, end) with either
+    bound optional; {} for no window. Used as the first $match / find filter
+    so every windowed query is an index range scan.
+    """
+    if not window:
+        return {}
+    start, end = window
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = start
+    if end is not None:
+        bounds["$lt"] = end
+    return {field: bounds} if bounds else {}
+
+
+def data_version(col, field="_id"):
+    """
+    Cheap change marker for a collection: newest `field` value plus estimated
+    count. ObjectIds grow monotonically, so any insert changes it; the count
+    catches deletes. For collections updated in place (qa_agreement) pass an
+    indexed timestamp field instead. Costs one index probe and a metadata read.
+    """
+    newest = col.find_one({}, {field: 1}, sort=[(field, -1)])
+    return f"{newest.get(field) if newest else None}:{col.estimated_document_count()}"
+
+
+def auditor_counts(audit_col):
+    """
+    {content_id: number of distinct interns who audited it} in one pipeline.
+    The first $group only touches (content_id, intern_id), so with
+    AUDITOR_INDEX hinted it is answered from the index without fetching docs.
+    """
+    pipeline = [
+        {"$project": {"_id": 0, "content_id": 1, "intern_id": 1}},
+        {"$group": {"_id": {"c": "$content_id", "i": "$intern_id"}}},
+        {"$group": {"_id": "$_id.c", "auditors": {"$sum": 1}}},
+    ]
+    return {
+        doc["_id"]: doc["auditors"]
+        for doc in audit_col.aggregate(pipeline, hint=AUDITOR_INDEX, allowDiskUse=True)
+    }
+
+
+def compute_completion_status(db, required=5):
+    """
+    Completion summary for the overview panel:
+    {"content_ids": [...], "completed_ids": [...], "auditor_counts": {...}}.
+    """
+    content_ids = db["QA_pairs"].distinct("content_id")
+    # audit_submissions carries content_id / intern_id at the top level with
+    # the same (content_id, intern_id) index, so it answers this directly
+    counts = auditor_counts(db[SUBMISSIONS] if audit_schema() == "compact" else db["audit_logs"])
+    completed = [cid for cid in content_ids if counts.get(cid, 0) == required]
+    return {"content_ids": content_ids, "completed_ids": completed, "auditor_counts": counts}
+
+
+def completion_status(db, required=5):
+    """
+    Shared compute_completion_status, keyed by the QA_pairs and audit data
+    versions.
+    """
+    version = (data_version(db["QA_pairs"]), judgment_versions(db)[0])
+    return shared_result(
+        ("completion_status", required), version,
+        lambda: compute_completion_status(db, required)
+    )
+
+
+def kappa_frame(rows, required=5, exclude_doubts=True):
+    """
+    Pure in-memory half of kappa_table: qa_agreement rows -> (kappa_df,
+    corpus_kappa). Doubt exclusion is a vectorised mask on each row's own
+    doubt counter — O(pairs), no lookup against the doubt list at all.
+    """
+    import pandas as pd
+
+    columns = ["content_id", "qa_index", "fleiss_kappa", "count", "majority"]
+    df = pd.DataFrame(rows, columns=["content_id", "qa_index", "correct", "incorrect", "doubt"])
+    keep = (df["correct"] + df["incorrect"]).to_numpy() == required
+    if exclude_doubts:
+        keep &= df["doubt"].fillna(0).to_numpy() == 0
+    df = df[keep]
+    if df.empty:
+        return pd.DataFrame(columns=columns), None
+
+    counts = df[["correct", "incorrect"]].to_numpy()
+    kappa = per_item_fleiss_kappa(counts)
+    df = df.assign(
+        fleiss_kappa=np.round(kappa, 4),
+        count=required,
+        majority=np.array(["Correct", "Incorrect"])[majority_index(counts)]
+    )
+    df = df[~np.isnan(kappa)]
+    corpus = fleiss_kappa(counts)
+    return df[columns].reset_index(drop=True), None if np.isnan(corpus) else float(corpus)
+
+
+def window_agreement_pipeline(window, query, doubt_source="doubt_logs"):
+    """
+    qa_agreement rows matching `query` for the pairs judged (or doubted)
+    inside `window`: the timestamp range runs first on both log collections'
+    timestamp indexes, then each distinct pair is looked up on the unique
+    (content_id, qa_index) index.
+    """
+    match = window_match(window)
+    return [
+        {"$match": match},
+        {"$project": {"_id": 0, "content_id": 1, "qa_index": 1}},
+        {"$unionWith": {"coll": doubt_source, "pipeline": [
+            {"$match": match},
+            {"$project": {"_id": 0, "content_id": 1, "qa_index": 1}}
+        ]}},
+        {"$group": {"_id": {"c": "$content_id", "q": "$qa_index"}}},
+        {"$lookup": {
+            "from": "qa_agreement",
+            "let": {"c": "$_id.c", "q": "$_id.q"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$content_id", "$$c"]},
+                    {"$eq": ["$qa_index", "$$q"]}
+                ]}}},
+                {"$match": query},
+                {"$project": {"_id": 0, "content_id": 1, "qa_index": 1, "correct": 1, "incorrect": 1, "doubt": 1}}
+            ],
+            "as": "agree"
+        }},
+        {"$unwind": "$agree"},
+        {"$replaceRoot": {"newRoot": "$agree"}}
+    ]
+
+
+def compute_kappa_table(db, required=5, exclude_doubts=True, window=None):
+    """
+    Per-QA-pair Fleiss' kappa + majority for every pair with exactly
+    `required` confident judgments. The n/doubt filter runs server-side on
+    the (n, doubt) index of qa_agreement; the kappa maths is one vectorised
+    pass. With a `window`, only pairs judged inside it are scored.
+    Returns (kappa_df, corpus_kappa).
+    """
+    query = {"n": required}
+    if exclude_doubts:
+        query["doubt"] = 0
+    if window:
+        audit_col, doubt_col = judgment_sources(db)
+        rows = list(audit_col.aggregate(window_agreement_pipeline(window, query, doubt_col.name), allowDiskUse=True))
+    else:
+        rows = list(db["qa_agreement"].find(
+            query,
+            {"_id": 0, "content_id": 1, "qa_index": 1, "correct": 1, "incorrect": 1, "doubt": 1}
+        ))
+    return kappa_frame(rows, required, exclude_doubts)
+
+
+def kappa_table(db, required=5, exclude_doubts=True, window=None):
+    """
+    Shared compute_kappa_table, keyed by the qa_agreement data version.
+    """
+    version = data_version(db["qa_agreement"], "updated_at")
+    return shared_result(
+        ("kappa_table", required, exclude_doubts, window), version,
+        lambda: compute_kappa_table(db, required, exclude_doubts, window)
+    )
+
+
+ALPHA_CATEGORIES = ["Correct", "Incorrect", "Doubt"]
+ALPHA_COLUMNS = ["Intern ID", "Judgments", "Disagreement", "Share (%)", "Alpha Without"]
+
+
+def judgment_triples(db, include_doubts=False, window=None):
+    """
+    Every judgment as an (item, intern_id, judgment) frame. Items are short
+    pairs ("short", content_id, qa_index) from audit_logs (+ doubt_logs when
+    `include_doubts`) and medium/long items ("ml", content_id, key) from
+    medium_long_audits. A rater's repeat judgment of an item keeps the first.
+    """
+    import pandas as pd
+
+    match = window_match(window)
+    projection = {"_id": 0, "content_id": 1, "qa_index": 1, "intern_id": 1, "judgment": 1}
+    audit_col, doubt_col = judgment_sources(db)
+    sources = [audit_col.find({**match, "judgment": {"$in": ["Correct", "Incorrect"]}}, projection)]
+    if include_doubts:
+        sources.append(doubt_col.find({**match, "judgment": "Doubt"}, projection))
+
+    rows = [
+        (("short", doc["content_id"], doc["qa_index"]), doc["intern_id"], doc["judgment"])
+        for cursor in sources for doc in cursor
+    ]
+    for doc in db["medium_long_audits"].find(match, {"_id": 0, "content_id": 1, "intern_id": 1, "judgments": 1}):
+        rows.extend(
+            (("ml", doc["content_id"], key), doc["intern_id"], judgment)
+            for key, judgment in (doc.get("judgments") or {}).items()
+        )
+
+    df = pd.DataFrame(rows, columns=["item", "intern_id", "judgment"])
+    df = df[df["judgment"].isin(ALPHA_CATEGORIES)]
+    return df.drop_duplicates(["item", "intern_id"]).reset_index(drop=True)
+
+
+def alpha_frame(df):
+    """
+    Pure in-memory half of krippendorff: judgment triples -> (alpha,
+    per-intern contribution frame). Everything after factorising is NumPy.
+    """
+    import pandas as pd
+
+    if df.empty:
+        return None, pd.DataFrame(columns=ALPHA_COLUMNS)
+    items, _ = pd.factorize(df["item"])
+    raters, interns = pd.factorize(df["intern_id"])
+    values = pd.Categorical(df["judgment"], categories=ALPHA_CATEGORIES).codes
+
+    alpha = krippendorff_alpha(item_category_counts(items, values, n_categories=len(ALPHA_CATEGORIES)))
+    parts = rater_contributions(items, raters, values, n_categories=len(ALPHA_CATEGORIES))
+    per_intern = pd.DataFrame({
+        "Intern ID": interns,
+        "Judgments": parts["judgments"],
+        "Disagreement": np.round(parts["disagreement"], 4),
+        "Share (%)": np.round(parts["share"] * 100, 2),
+        "Alpha Without": np.round(parts["alpha_without"], 4),
+    }).sort_values("Share (%)", ascending=False).reset_index(drop=True)
+    return None if np.isnan(alpha) else float(alpha), per_intern
+
+
+def compute_krippendorff(db, include_doubts=False, window=None):
+    """
+    Corpus-level nominal Krippendorff's alpha over every short and
+    medium/long item, however many raters it has so far, plus each intern's
+    contribution. Returns (alpha, per_intern_df).
+    """
+    return alpha_frame(judgment_triples(db, include_doubts, window))
+
+
+def krippendorff(db, include_doubts=False, window=None):
+    """
+    Shared compute_krippendorff, keyed by the audit, doubt and medium/long
+    audit data versions.
+    """
+    version = (*judgment_versions(db), data_version(db["medium_long_audits"]))
+    return shared_result(
+        ("krippendorff", include_doubts, window), version,
+        lambda: compute_krippendorff(db, include_doubts, window)
+    )
+
+
+LEADERBOARD_COLUMNS = [
+    "Intern ID", "Valid Pairs", "Correct Given", "Incorrect Given",
+    "Content Audited", "Doubts Raised", "Quality (%)"
+]
+
+
+def leaderboard_pipeline(required=5, window=None, doubt_source="doubt_logs"):
+    """
+    One grouped pass over audit_logs ∪ doubt_logs (each restricted to
+    `window` on its timestamp index). Each judgment is joined to its
+    qa_agreement row (unique (content_id, qa_index) index) to pick up the
+    majority, but only for pairs that made it into the kappa table.
+    """
+    def count_if(cond):
+        return {"$sum": {"$cond": [cond, 1, 0]}}
+
+    is_doubt = {"$eq": [{"$ifNull": ["$is_doubt", False]}, True]}
+    match = window_match(window)
+    return [
+        {"$match": match},
+        {"$project": {"_id": 0, "intern_id": 1, "content_id": 1, "qa_index": 1, "judgment": 1}},
+        {"$lookup": {
+            "from": "qa_agreement",
+            "let": {"c": "$content_id", "q": "$qa_index"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$content_id", "$$c"]},
+                    {"$eq": ["$qa_index", "$$q"]}
+                ]}}},
+                {"$match": {"n": required, "doubt": 0, "kappa": {"$ne": None}}},
+                {"$project": {"_id": 0, "majority": 1}}
+            ],
+            "as": "agree"
+        }},
+        {"$set": {"majority": {"$arrayElemAt": ["$agree.majority", 0]}}},
+        {"$unionWith": {"coll": doubt_source, "pipeline": [
+            {"$match": match},
+            {"$project": {"_id": 0, "intern_id": 1, "is_doubt": {"$literal": True}}}
+        ]}},
+        {"$group": {
+            "_id": "$intern_id",
+            "valid": count_if({"$not": [is_doubt]}),
+            "correct": count_if({"$eq": ["$judgment", "Correct"]}),
+            "incorrect": count_if({"$eq": ["$judgment", "Incorrect"]}),
+            "contents": {"$addToSet": {"$cond": [is_doubt, "$$REMOVE", "$content_id"]}},
+            "doubts": count_if(is_doubt),
+            # doubt rows carry neither judgment nor majority, and a missing
+            # field is neither $ne null nor unequal to another missing one
+            "matches": count_if({"$and": [
+                {"$not": [is_doubt]},
+                {"$ne": [{"$ifNull": ["$majority", None]}, None]},
+                {"$eq": ["$judgment", "$majority"]}
+            ]})
+        }},
+        # like the old loop: only interns with at least one audit_logs judgment
+        {"$match": {"valid": {"$gt": 0}}},
+        {"$project": {
+            "_id": 0,
+            "Intern ID": "$_id",
+            "Valid Pairs": "$valid",
+            "Correct Given": "$correct",
+            "Incorrect Given": "$incorrect",
+            "Content Audited": {"$size": "$contents"},
+            "Doubts Raised": "$doubts",
+            "Quality (%)": {"$round": [
+                {"$multiply": [{"$divide": ["$matches", "$valid"]}, 100]}, 2
+            ]}
+        }}
+    ]
+
+
+def compute_leaderboard(db, required=5, window=None):
+    """
+    Intern leaderboard as a DataFrame with LEADERBOARD_COLUMNS.
+    """
+    import pandas as pd
+
+    audit_col, doubt_col = judgment_sources(db)
+    rows = list(audit_col.aggregate(leaderboard_pipeline(required, window, doubt_col.name), allowDiskUse=True))
+    return pd.DataFrame(rows, columns=LEADERBOARD_COLUMNS)
+
+
+def leaderboard(db, required=5, window=None):
+    """
+    Shared compute_leaderboard, keyed by the audit_logs, doubt_logs and
+    qa_agreement data versions.
+    """
+    version = (*judgment_versions(db), data_version(db["qa_agreement"], "updated_at"))
+    return shared_result(
+        ("leaderboard", required, window), version,
+        lambda: compute_leaderboard(db, required, window)
+    )
+
+
+def source_versions(db):
+    """
+    data_version of every collection the dashboards read, as one dict.
+    """
+    audit_version, doubt_version = judgment_versions(db)
+    return {
+        "qa_pairs": data_version(db["QA_pairs"]),
+        "audit_logs": audit_version,
+        "doubt_logs": doubt_version,
+        "qa_agreement": data_version(db["qa_agreement"], "updated_at"),
+        "medium_long_audits": data_version(db["medium_long_audits"]),
+    }
+
+
+def compute_overview(db, window=None):
+    """
+    Judgment count, active interns, Correct/Incorrect distribution and doubts
+    per intern — all answered by counts and $group on the server, over the
+    timestamp index range when a `window` is given.
+    """
+    audit_col, doubt_col = judgment_sources(db)
+    match = window_match(window)
+    distribution = {
+        doc["_id"]: doc["count"]
+        for doc in audit_col.aggregate([
+            {"$match": {**match, "judgment": {"$in": ["Correct", "Incorrect"]}}},
+            {"$group": {"_id": "$judgment", "count": {"$sum": 1}}}
+        ])
+    }
+    doubts = {
+        doc["_id"]: doc["count"]
+        for doc in doubt_col.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$intern_id", "count": {"$sum": 1}}}
+        ])
+    }
+    return {
+        "judgments": audit_col.count_documents(match),
+        "active_interns": len(audit_col.distinct("intern_id", match)),
+        "judgment_distribution": distribution,
+        "doubts_per_intern": doubts,
+    }
+
+
+DAILY_QUALITY_METRICS = {
+    "Agreement with majority (%)": "agreement",
+    "Doubt rate (%)": "doubt_rate",
+    "Median time taken (s)": "median_time",
+}
+
+
+def daily_quality_frame(rows):
+    """
+    Pure in-memory half of daily_quality: intern_daily_quality docs -> one
+    row per (day, intern_id) with the derived rates.
+    """
+    import pandas as pd
+
+    columns = ["day", "intern_id", "judged", "doubts", "submissions", "rated", "matches"]
+    df = pd.DataFrame(rows, columns=columns + ["time_hist"])
+    if df.empty:
+        return pd.DataFrame(columns=columns + list(DAILY_QUALITY_METRICS.values()))
+    df[columns[2:]] = df[columns[2:]].fillna(0).astype(int)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df["agreement"] = np.round(100 * df["matches"] / df["rated"].where(df["rated"] > 0), 2)
+        df["doubt_rate"] = np.round(100 * df["doubts"] / (df["judged"] + df["doubts"]).where(lambda n: n > 0), 2)
+    # approximate: interpolated inside the time_hist bucket (daily_quality.TIME_BUCKETS)
+    medians = [daily_quality.histogram_median(h) if isinstance(h, dict) else None for h in df["time_hist"]]
+    df["median_time"] = [np.nan if m is None else round(m, 1) for m in medians]
+    df["day"] = pd.to_datetime(df["day"])
+    return df.drop(columns="time_hist").sort_values(["day", "intern_id"]).reset_index(drop=True)
+
+
+def compute_daily_quality(db, window=None, tz=daily_quality.TZ):
+    """
+    Per-intern daily quality series from the incrementally maintained
+    intern_daily_quality collection — a range read on its day index.
+    """
+    query = {}
+    if window:
+        start, end = window
+        query["day"] = {}
+        if start is not None:
+            query["day"]["$gte"] = daily_quality.day_of(start, tz)
+        if end is not None:
+            query["day"]["$lt"] = daily_quality.day_of(end, tz)
+    rows = list(db[daily_quality.COLLECTION].find(query, {"_id": 0, "updated_at": 0}))
+    return daily_quality_frame(rows)
+
+
+def daily_quality_series(db, window=None):
+    """
+    Shared compute_daily_quality, keyed by the series' updated_at version.
+    """
+    version = data_version(db[daily_quality.COLLECTION], "updated_at")
+    return shared_result(
+        ("daily_quality", window), version,
+        lambda: compute_daily_quality(db, window)
+    )
+
+
+def compute_judgment_trend(db, unit="day", tz="Asia/Kolkata", by_intern=False, window=None):
+    """
+    Judgment counts per `unit` ("day" or "hour") bucket in time zone `tz`,
+    optionally split per intern. Bucketing is a $dateTrunc + $group on the
+    server over the timestamp index, so only the bucket counts come back.
+    Returns a DataFrame with columns bucket (tz-aware), [intern_id,] count.
+    """
+    import pandas as pd
+
+    group_id = {"bucket": {"$dateTrunc": {"date": "$timestamp", "unit": unit, "timezone": tz}}}
+    if by_intern:
+        group_id["intern_id"] = "$intern_id"
+    pipeline = [
+        {"$match": window_match(window) or {"timestamp": {"$type": "date"}}},
+        {"$project": {"_id": 0, "timestamp": 1, **({"intern_id": 1} if by_intern else {})}},
+        {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+        {"$sort": {"_id.bucket": 1}}
+    ]
+    rows = [
+        {**doc["_id"], "count": doc["count"]}
+        for doc in judgment_sources(db)[0].aggregate(pipeline, allowDiskUse=True)
+    ]
+    columns = ["bucket"] + (["intern_id"] if by_intern else []) + ["count"]
+    df = pd.DataFrame(rows, columns=columns)
+    if not df.empty:
+        df["bucket"] = pd.to_datetime(df["bucket"], utc=True).dt.tz_convert(tz)
+    return df
+
+
+def judgment_trend(db, unit="day", tz="Asia/Kolkata", by_intern=False, window=None):
+    """
+    Shared compute_judgment_trend, keyed by the audit data version.
+    """
+    return shared_result(
+        ("judgment_trend", unit, tz, by_intern, window), judgment_versions(db)[0],
+        lambda: compute_judgment_trend(db, unit, tz, by_intern, window)
+    )
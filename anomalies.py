@@ -0,0 +1,357 @@
+from pymongo import MongoClient, UpdateOne
+import streamlit as st
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+import argparse
+import time
+import numpy as np
+from agreement import retraction_ops
+from compact_audits import MIGRATIONS, SUBMISSIONS
+from daily_quality import COLLECTION as DAILY_QUALITY, consensus_majorities, consensus_ops, day_of, rater_judgments
+from submission import supports_transactions
+
+# Speed/quality anomaly scan. New submissions (one per intern per content)
+# are scored against the intern's own rolling time-per-QA distribution and
+# their rolling agreement with the majority, and written to submission_flags.
+# The scan only reads judgments past its _id checkpoint in `migrations`.
+FLAGS               = "submission_flags"
+BATCH_SIZE          = 5_000
+SETTLE_SECONDS      = 60      # skip the newest _ids until their transaction has surely committed
+MIN_SECONDS_PER_QA  = 3.0     # faster than this is never a real read
+ROLLING_SUBMISSIONS = 50      # intern's own speed baseline: last N submissions
+MIN_HISTORY         = 10
+SPEED_Z             = -3.5    # robust z-score vs that baseline
+ROLLING_DAYS        = 14      # agreement rate window
+MIN_RATED           = 20
+AGREEMENT_Z         = -3.0    # vs the cohort of interns over the same window
+INTERVAL            = 300
+
+
+def ensure_indexes(db):
+    db[FLAGS].create_index([("intern_id", 1), ("content_id", 1)], unique=True)
+    db[FLAGS].create_index([("intern_id", 1), ("timestamp", 1)])
+    db[FLAGS].create_index([("flagged", 1), ("excluded", 1)])
+    db[FLAGS].create_index([("timestamp", 1), ("_id", 1)])
+    # excluded raters of one content (daily_quality.rater_judgments)
+    db[FLAGS].create_index([("content_id", 1), ("excluded", 1)])
+
+
+def new_submission_keys(db, sources, until):
+    """
+    (intern_id, content_id) of every submission with judgments added since
+    each source's checkpoint and before `until`.
+    Returns (keys, {source: last _id read}).
+    """
+    keys, marks = set(), {}
+    for source in sources:
+        state = db[MIGRATIONS].find_one({"_id": f"anomalies:{source}"}) or {}
+        query = {"_id": {"$lt": until}}
+        if state.get("last_id") is not None:
+            query["_id"]["$gt"] = state["last_id"]
+        docs = list(db[source].find(query, {"intern_id": 1, "content_id": 1}).sort("_id", 1).limit(BATCH_SIZE))
+        if docs:
+            marks[source] = docs[-1]["_id"]
+            keys.update((d["intern_id"], d["content_id"]) for d in docs)
+    return sorted(keys, key=str), marks
+
+
+def load_submissions(db, keys, compact=False):
+    """
+    One row per submission in `keys`, read in full (not just the rows past
+    the checkpoint), so a submission split across batches or across
+    audit_logs/doubt_logs is always scored as a whole.
+    """
+    import pandas as pd
+
+    match = {"$or": [{"intern_id": i, "content_id": c} for i, c in keys]}
+    projection = {"_id": 0, "intern_id": 1, "content_id": 1, "timestamp": 1, "time_taken": 1, "judgment": 1, "judgments": 1}
+    sources = [SUBMISSIONS] if compact else ["audit_logs", "doubt_logs"]
+    rows = []
+    for source in sources:
+        for d in db[source].find(match, projection):
+            judgments = d.get("judgments") or [{"judgment": d.get("judgment")}]
+            doubts = sum(1 for j in judgments if j.get("judgment") == "Doubt")
+            rows.append((d["intern_id"], d["content_id"], d.get("timestamp"), d.get("time_taken"),
+                         len(judgments) - doubts, doubts))
+
+    df = pd.DataFrame(rows, columns=["intern_id", "content_id", "timestamp", "time_taken", "judged", "doubts"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    return df.groupby(["intern_id", "content_id"], as_index=False).agg(
+        timestamp=("timestamp", "min"), time_taken=("time_taken", "max"),
+        judged=("judged", "sum"), doubts=("doubts", "sum")
+    )
+
+
+def speed_history(db, interns, since):
+    """
+    Seconds-per-QA of the interns' already scored, unflagged submissions
+    since `since`, the left edge of each rolling baseline — so a gradual
+    speed-up is measured against honest history, not against itself.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(
+        list(db[FLAGS].find(
+            {"intern_id": {"$in": interns}, "timestamp": {"$gte": since.to_pydatetime()}, "flagged": {"$ne": True}},
+            {"_id": 0, "intern_id": 1, "content_id": 1, "timestamp": 1, "seconds_per_qa": 1}
+        )),
+        columns=["intern_id", "content_id", "timestamp", "seconds_per_qa"]
+    )
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    return df
+
+
+def speed_scores(new, history):
+    """
+    Robust z-score of every new submission's seconds-per-QA against the
+    intern's previous ROLLING_SUBMISSIONS submissions: median and IQR / 1.349
+    from groupby-rolling quantiles, shifted so a row never sees itself.
+    """
+    import pandas as pd
+
+    new = new.assign(is_new=True)
+    # a rescored submission must not be part of its own baseline
+    rescored = history.set_index(["intern_id", "content_id"]).index.isin(
+        new.set_index(["intern_id", "content_id"]).index
+    )
+    both = pd.concat([history[~rescored].assign(is_new=False), new], ignore_index=True)
+    both = both.sort_values(["intern_id", "timestamp"], kind="stable").reset_index(drop=True)
+    rolling = both.groupby("intern_id")["seconds_per_qa"].rolling(ROLLING_SUBMISSIONS, min_periods=MIN_HISTORY)
+    q = pd.DataFrame({
+        "median": rolling.median().reset_index(level=0, drop=True),
+        "q25": rolling.quantile(0.25).reset_index(level=0, drop=True),
+        "q75": rolling.quantile(0.75).reset_index(level=0, drop=True),
+    }).groupby(both["intern_id"]).shift(1)
+    spread = ((q["q75"] - q["q25"]) / 1.349).where(lambda s: s > 0)
+    both["baseline"] = q["median"]
+    both["speed_z"] = (both["seconds_per_qa"] - q["median"]) / spread
+    return both[both["is_new"].astype(bool)].drop(columns="is_new")
+
+
+def agreement_scores(db, interns, days):
+    """
+    {(intern_id, day): (rolling agreement, robust z vs the cohort)} from the
+    intern_daily_quality series, each intern's agreement summed over the
+    ROLLING_DAYS days up to and including `day`.
+    """
+    import pandas as pd
+
+    first = min(days)
+    start = (pd.Timestamp(first) - pd.Timedelta(days=ROLLING_DAYS - 1)).strftime("%Y-%m-%d")
+    df = pd.DataFrame(
+        list(db[DAILY_QUALITY].find(
+            {"day": {"$gte": start, "$lte": max(days)}},
+            {"_id": 0, "intern_id": 1, "day": 1, "rated": 1, "matches": 1}
+        )),
+        columns=["intern_id", "day", "rated", "matches"]
+    ).fillna(0)
+    if df.empty:
+        return {}
+
+    grid = df.pivot_table(index="day", columns="intern_id", values=["rated", "matches"], aggfunc="sum", fill_value=0)
+    grid.index = pd.to_datetime(grid.index)
+    grid = grid.reindex(pd.date_range(grid.index.min(), max(pd.to_datetime(days)), freq="D"), fill_value=0)
+    window = grid.rolling(ROLLING_DAYS, min_periods=1).sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = (window["matches"] / window["rated"]).where(window["rated"] >= MIN_RATED)
+    median = rate.median(axis=1)
+    spread = ((rate.quantile(0.75, axis=1) - rate.quantile(0.25, axis=1)) / 1.349).where(lambda s: s > 0)
+    z = rate.sub(median, axis=0).div(spread, axis=0)
+
+    out = {}
+    for day in days:
+        ts = pd.Timestamp(day)
+        for intern in interns:
+            if intern in rate.columns and ts in rate.index and not np.isnan(rate.at[ts, intern]):
+                out[intern, day] = (float(rate.at[ts, intern]), float(z.at[ts, intern]))
+    return out
+
+
+def score_submissions(db, subs):
+    """
+    Add seconds_per_qa, speed baseline/z, rolling agreement/z, reasons and
+    the flagged verdict to a frame of new submissions.
+    """
+    import pandas as pd
+
+    subs = subs.assign(seconds_per_qa=subs["time_taken"] / (subs["judged"] + subs["doubts"]).clip(lower=1))
+    subs["timestamp"] = subs["timestamp"].fillna(pd.Timestamp.now(tz="UTC"))
+    interns = subs["intern_id"].unique().tolist()
+    since = subs["timestamp"].min() - timedelta(days=ROLLING_DAYS)
+    subs = speed_scores(subs, speed_history(db, interns, since))
+
+    subs["day"] = [day_of(ts.to_pydatetime()) for ts in subs["timestamp"]]
+    agreement = agreement_scores(db, interns, sorted(subs["day"].unique()))
+    pairs = [agreement.get((i, d), (np.nan, np.nan)) for i, d in zip(subs["intern_id"], subs["day"])]
+    subs["agreement"] = [p[0] for p in pairs]
+    subs["agreement_z"] = [p[1] for p in pairs]
+
+    too_fast = (subs["seconds_per_qa"] < MIN_SECONDS_PER_QA).to_numpy()
+    faster = (subs["speed_z"] < SPEED_Z).to_numpy()
+    low_agreement = (subs["agreement_z"] < AGREEMENT_Z).to_numpy()
+    subs["reasons"] = [
+        [r for r, hit in (("too_fast", a), ("faster_than_usual", b), ("low_agreement", c)) if hit]
+        for a, b, c in zip(too_fast, faster, low_agreement)
+    ]
+    # an unusually fast submission alone is not enough; from a low-agreement
+    # intern it is
+    subs["flagged"] = too_fast | (faster & low_agreement)
+    return subs
+
+
+def flag_ops(subs, now):
+    def clean(v):
+        return None if isinstance(v, float) and np.isnan(v) else v
+
+    ops = []
+    for row in subs.to_dict(orient="records"):
+        ops.append(UpdateOne(
+            {"intern_id": row["intern_id"], "content_id": row["content_id"]},
+            {"$set": {
+                "timestamp": row["timestamp"].to_pydatetime(),
+                "time_taken": clean(row["time_taken"]),
+                "judged": int(row["judged"]),
+                "doubts": int(row["doubts"]),
+                "seconds_per_qa": clean(round(row["seconds_per_qa"], 2)),
+                "baseline": clean(row["baseline"]),
+                "speed_z": clean(row["speed_z"]),
+                "agreement": clean(row["agreement"]),
+                "agreement_z": clean(row["agreement_z"]),
+                "reasons": row["reasons"],
+                "flagged": bool(row["flagged"]),
+                "scored_at": now,
+            }, "$setOnInsert": {"excluded": False}},
+            upsert=True
+        ))
+    return ops
+
+
+def scan_once(db, compact=False, settle=SETTLE_SECONDS):
+    """
+    Score one batch of new submissions and advance the checkpoints.
+    Returns the number of submissions read (0 once caught up).
+    """
+    sources = [SUBMISSIONS] if compact else ["audit_logs", "doubt_logs"]
+    now = datetime.now(timezone.utc)
+    until = ObjectId.from_datetime(now - timedelta(seconds=settle))
+    keys, marks = new_submission_keys(db, sources, until)
+    if not keys:
+        return 0
+    # an excluded submission keeps its verdict: rescoring could unflag it
+    # while its judgments stay retracted
+    excluded = {
+        (d["intern_id"], d["content_id"])
+        for d in db[FLAGS].find(
+            {"excluded": True, "$or": [{"intern_id": i, "content_id": c} for i, c in keys]},
+            {"_id": 0, "intern_id": 1, "content_id": 1}
+        )
+    }
+    scored = [k for k in keys if k not in excluded]
+    if scored:
+        subs = load_submissions(db, scored, compact)
+        db[FLAGS].bulk_write(flag_ops(score_submissions(db, subs), now), ordered=False)
+    for source, last_id in marks.items():
+        db[MIGRATIONS].update_one(
+            {"_id": f"anomalies:{source}"},
+            {"$set": {"last_id": last_id, "updated_at": now}, "$inc": {"scored": len(scored)}},
+            upsert=True
+        )
+    return len(keys)
+
+
+def submission_judgments(db, flag, compact=False, session=None):
+    if compact:
+        doc = db[SUBMISSIONS].find_one(
+            {"content_id": flag["content_id"], "intern_id": flag["intern_id"]}, session=session
+        )
+        return (doc or {}).get("judgments", [])
+    key = {"intern_id": flag["intern_id"], "content_id": flag["content_id"]}
+    projection = {"_id": 0, "qa_index": 1, "judgment": 1}
+    return (list(db["audit_logs"].find(key, projection, session=session))
+            + list(db["doubt_logs"].find(key, projection, session=session)))
+
+
+def exclude_flagged(client, db, compact=False):
+    """
+    Take the judgments of every flagged, not yet excluded submission back out
+    of qa_agreement, so they no longer count towards majority or kappa, and
+    redo the intern_daily_quality agreement credits of the pairs it touched
+    (which agreement_scores reads). The flag is claimed (excluded=True) in
+    the same transaction as the retraction, so each submission is retracted
+    exactly once.
+    """
+    excluded = 0
+    for flag in db[FLAGS].find({"flagged": True, "excluded": False}, {"intern_id": 1, "content_id": 1}):
+        def retract(session=None):
+            cid = flag["content_id"]
+            entries = [e for e in submission_judgments(db, flag, compact, session) if e.get("judgment")]
+            indexes = list({e["qa_index"] for e in entries})
+            # credits granted while these pairs were at consensus, this
+            # submission's rater included
+            before = consensus_majorities(db, cid, indexes, session=session)
+            credited = rater_judgments(db, cid, list(before), compact, session) if before else []
+
+            now = datetime.now(timezone.utc)
+            res = db[FLAGS].update_one(
+                {"_id": flag["_id"], "excluded": False},
+                {"$set": {"excluded": True, "excluded_at": now}},
+                session=session
+            )
+            if not res.modified_count:
+                return 0
+            if entries:
+                db["qa_agreement"].bulk_write(
+                    retraction_ops(cid, flag["intern_id"], entries), ordered=True, session=session
+                )
+            # a pair can also reach consensus by losing a doubt or a surplus judgment
+            after = consensus_majorities(db, cid, indexes, session=session)
+            ops = consensus_ops(credited, before, now, sign=-1)
+            if after:
+                ops += consensus_ops(rater_judgments(db, cid, list(after), compact, session), after, now)
+            if ops:
+                db[DAILY_QUALITY].bulk_write(ops, ordered=False, session=session)
+            return 1
+
+        if supports_transactions(client):
+            with client.start_session() as session:
+                excluded += session.with_transaction(retract)
+        else:
+            excluded += retract()
+    return excluded
+
+
+def run_scan(client, db, compact=False, exclude=False, log=print):
+    """
+    Score everything new since the last run, batch by batch, then optionally
+    exclude the flagged submissions from agreement.
+    """
+    ensure_indexes(db)
+    scored = 0
+    while True:
+        n = scan_once(db, compact)
+        if not n:
+            break
+        scored += n
+        log(f"scored {scored} submissions")
+    flagged = db[FLAGS].count_documents({"flagged": True})
+    excluded = exclude_flagged(client, db, compact) if exclude else 0
+    return {"scored": scored, "flagged_total": flagged, "excluded": excluded}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flag suspiciously fast / low-agreement submissions")
+    parser.add_argument("--exclude", action="store_true",
+                        default=st.secrets.get("exclude_flagged", False),
+                        help="retract flagged submissions from qa_agreement (majority/kappa)")
+    parser.add_argument("--loop", action="store_true", help="keep scanning every --interval seconds")
+    parser.add_argument("--interval", type=int, default=INTERVAL)
+    args = parser.parse_args()
+
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+    compact = st.secrets.get("audit_schema", "per_pair") == "compact"
+    while True:
+        print(run_scan(client, db, compact, args.exclude))
+        if not args.loop:
+            break
+        time.sleep(args.interval)
@@ -1,14 +1,25 @@
 import streamlit as st
 import streamlit.components.v1 as components
-from pymongo import MongoClient, InsertOne, ReturnDocument
-from pymongo.errors import DuplicateKeyError, BulkWriteError
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError, PyMongoError
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 import time, re, random
 from auth0_component import login_button
+from submission import persist_submission, submission_key
+from agreement import ensure_indexes as ensure_agreement_indexes
+from compact_audits import ensure_indexes as ensure_compact_indexes
+from daily_quality import ensure_indexes as ensure_daily_quality_indexes
+from content_validity import ensure_indexes as ensure_validity_indexes, refresh_validity, COLLECTION as VALIDITY
+import outbox
 
 TIMER_SECONDS = 60 * 7
 MAX_AUDITORS  = 5
 
+# "per_pair": one audit_logs/doubt_logs row per QA pair (legacy)
+# "compact":  one audit_submissions doc per (content, intern) — see compact_audits.py
+AUDIT_SCHEMA  = st.secrets.get("audit_schema", "per_pair")
+
 
 
 def log_system_event(event, message, details=None):
@@ -94,29 +105,55 @@ db          = client["Tel_QA"]
 users_col   = db["users"]
 content_col = db["Content"]
 qa_col      = db["QA_pairs"]
-audit_col   = db["audit_logs"]
+# in compact mode every "who audited what" read goes to audit_submissions,
+# which carries content_id / intern_id at the top level just like audit_logs
+audit_col   = db["audit_submissions"] if AUDIT_SCHEMA == "compact" else db["audit_logs"]
 doubt_col   = db["doubt_logs"]
 skip_col    = db["skipped_logs"]
 
-audit_col.create_index([("content_id", 1), ("intern_id", 1)])
+# in compact mode ensure_compact_indexes owns audit_submissions' indexes
+# (the same key, unique), and creating it here too would conflict
+if AUDIT_SCHEMA != "compact":
+    audit_col.create_index([("content_id", 1), ("intern_id", 1)])
 skip_col.create_index([("intern_id", 1), ("content_id", 1)])
 skip_col.create_index([("status", 1), ("content_id", 1)])
 
 
 # === MAKE UNIQUE INDEX (but don’t blow up if there are dupes) ===
-try:
-    audit_col.create_index(
-        [("intern_id", 1), ("content_id", 1), ("qa_index", 1)],
-        unique=True,
-        background=True
-    )
-except DuplicateKeyError:
-    # There are existing duplicate documents; index build will skip them.
-    log_system_event(
-        "index_build_warning",
-        "Could not build unique index on audit_logs (duplicates exist).",
-        {}
-    )
+if AUDIT_SCHEMA == "compact":
+    ensure_compact_indexes(db)
+else:
+    try:
+        audit_col.create_index(
+            [("intern_id", 1), ("content_id", 1), ("qa_index", 1)],
+            unique=True,
+            background=True
+        )
+    except DuplicateKeyError:
+        # Historical duplicates exist — run `python dedupe_judgments.py` once.
+        log_system_event(
+            "index_build_warning",
+            "Could not build unique index on audit_logs (duplicates exist).",
+            {}
+        )
+    try:
+        doubt_col.create_index(
+            [("intern_id", 1), ("content_id", 1), ("qa_index", 1)],
+            unique=True,
+            background=True
+        )
+    except DuplicateKeyError:
+        log_system_event(
+            "index_build_warning",
+            "Could not build unique index on doubt_logs (duplicates exist).",
+            {}
+        )
+
+# per-(content_id, qa_index) agreement aggregates maintained at submit time
+ensure_agreement_indexes(db)
+ensure_daily_quality_indexes(db)
+# validity flags so invalid content never reaches the candidate queue
+ensure_validity_indexes(db)
 
 
 # track “reserved” slots so we can block concurrent assignments
@@ -209,15 +246,25 @@ def fetch_content_qa(cid: int):
 def get_eligible_ids():
     """
     Return every content_id with < MAX_AUDITORS distinct intern audits
-    and < 3 manual skips.
+    and < 3 manual skips, leaving out content flagged invalid.
     """
     pipeline = [
         # start from all QA_pairs content_ids
         {"$project": {"content_id": 1, "_id": 0}},
 
+        # drop ids the validity job flagged (no passage / malformed short QA)
+        # before the per-id lookups; ids not checked yet pass through
+        {"$lookup": {
+            "from": VALIDITY,
+            "localField": "content_id",
+            "foreignField": "content_id",
+            "as": "validity"
+        }},
+        {"$match": {"validity.valid": {"$ne": False}}},
+
         # group audit_logs by content_id + distinct intern_id
         {"$lookup": {
-            "from": "audit_logs",
+            "from": audit_col.name,
             "let": {"cid": "$content_id"},
             "pipeline": [
                 {"$match": {
@@ -285,6 +332,52 @@ def log_user_action(intern_id, action, details=None):
             "details":   details or {}
         })
 
+@st.cache_resource
+def get_log_executor():
+    """
+    One process-wide worker thread for non-critical log writes.
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-log")
+
+
+def log_user_action_deferred(intern_id, action, details=None):
+        """
+        Same as log_user_action, but queued on the background log worker so the
+        write never sits on the submit path. Failures land in system_logs.
+        """
+        def _write():
+            try:
+                log_user_action(intern_id, action, details)
+            except Exception as e:
+                log_system_event("deferred_log_error", str(e), {
+                    "intern_id": intern_id,
+                    "action":    action
+                })
+
+        get_log_executor().submit(_write)
+
+# === OPTIMISTIC SUBMIT (local durable outbox + background persistence) ===
+# opt-in: without optimistic_submit = true in secrets, submits persist inline
+OPTIMISTIC_SUBMIT = st.secrets.get("optimistic_submit", False)
+OUTBOX_PATH       = st.secrets.get("outbox_path", "submission_outbox.db")
+
+
+@st.cache_resource
+def get_outbox_worker():
+    """
+    Start the per-process worker that drains OUTBOX_PATH into Mongo.
+    Retries and permanent failures are reported to system_logs.
+    """
+    return outbox.start_worker(
+        OUTBOX_PATH,
+        persist=lambda payload: persist_submission(client, db, schema=AUDIT_SCHEMA, **payload),
+        on_event=log_system_event
+    )
+
+if OPTIMISTIC_SUBMIT:
+    # also drains anything left pending by a previous process
+    get_outbox_worker()
+
 # === ATOMIC ASSIGNMENT via placeholder collection ===
 def assign_new_content(intern_id):
     queue = st.session_state.candidate_queue
@@ -612,8 +705,9 @@ def main():
             "content_id": cid,
             "intern_id":  intern_id
         })
-        # log the skip
+        # log the skip, and flag the id so no one else is assigned it
         log_user_action(intern_id, "skipped_invalid", {"content_id": cid})
+        refresh_validity(db, [cid])
 
         st.warning(f"⚠️ Skipping ID {cid} — content or valid short QA missing.")
         st.session_state.current_content_id = None
@@ -695,43 +789,70 @@ def main():
         now = datetime.now(timezone.utc)
         time_taken = (now - st.session_state.assigned_time).total_seconds()
 
-        with st.spinner("Saving your judgments…"):
-            # 3) Remove reservation
-            assign_col.delete_many({"content_id": cid, "intern_id": intern_id})
+        queued = False
+        if OPTIMISTIC_SUBMIT:
+            # 3) Hand the batch to the durable outbox; the worker persists it.
+            # If the outbox cannot take it (disk full, permissions), save it
+            # synchronously below instead of dropping it.
+            sub_key = submission_key(intern_id, cid, st.session_state.assigned_time)
+            try:
+                outbox.enqueue(OUTBOX_PATH, sub_key, {
+                    "cid":           cid,
+                    "intern_id":     intern_id,
+                    "judgments":     judgments,
+                    "assigned_at":   st.session_state.assigned_time,
+                    "now":           now,
+                    "submission_id": sub_key
+                })
+                queued = True
+            except Exception as e:
+                log_system_event("outbox_enqueue_failed", f"{type(e).__name__}: {e}", {"content_id": cid})
 
-            # 4) Log submit event
-            log_user_action(intern_id, "submitted", {
+        if queued:
+            log_user_action_deferred(intern_id, "submitted", {
                 "content_id": cid,
-                "time_taken": time_taken
+                "time_taken": time_taken,
+                "optimistic": True
             })
+            log_user_action_deferred(intern_id, "next_after_submit", {"content_id": cid})
 
-            # 5) Bulk insert
-            audit_ops, doubt_ops = [], []
-            for entry in judgments:
-                doc = {
-                    "content_id": cid,
-                    "intern_id": intern_id,
-                    "qa_index": entry["qa_index"],
-                    "question": entry["question"],
-                    "answer": entry["answer"],
-                    "judgment": entry["judgment"],
-                    "timestamp": now,
-                    "assigned_at": st.session_state.assigned_time,
-                    "time_taken": time_taken,
-                    "length": "short",
-                }
-                (doubt_ops if entry["judgment"] == "Doubt" else audit_ops).append(InsertOne(doc))
-
-            if audit_ops:
-                try:
-                    audit_col.bulk_write(audit_ops, ordered=False)
-                except BulkWriteError as bwe:
-                    log_system_event("bulk_write_error", str(bwe.details))
-            if doubt_ops:
-                try:
-                    doubt_col.bulk_write(doubt_ops, ordered=False)
-                except BulkWriteError as bwe:
-                    log_system_event("bulk_write_error", str(bwe.details))
+            # 4) Move straight on to the next item
+            timer_ph.empty()
+            for key in list(st.session_state.keys()):
+                if key.startswith("j_"):
+                    del st.session_state[key]
+            st.session_state.current_content_id = None
+            st.session_state.submitted          = False
+            st.session_state.is_submitting      = False
+            st.toast(f"✅ Judgments for ID {cid} queued for saving")
+            assign_new_content(intern_id)
+            st.rerun()
+
+        with st.spinner("Saving your judgments…"):
+            # 3) Release reservation + write audits/doubts in one transaction
+            try:
+                persist_submission(
+                    client, db, cid, intern_id, judgments,
+                    st.session_state.assigned_time, now,
+                    submission_id=submission_key(intern_id, cid, st.session_state.assigned_time),
+                    schema=AUDIT_SCHEMA
+                )
+            except PyMongoError as e:
+                # nothing (or, on a standalone server, not everything) was
+                # saved: keep the intern on this item so they can resubmit;
+                # the keyed upserts make a resubmit safe
+                details = e.details if isinstance(e, BulkWriteError) else {}
+                log_system_event("submit_failed", f"{type(e).__name__}: {e}", {"content_id": cid, **(details or {})})
+                st.session_state.submitted     = False
+                st.session_state.is_submitting = False
+                st.error("❌ Your judgments could not be saved. Please submit again.")
+                return
+
+            # 4) Log submit event off the critical path
+            log_user_action_deferred(intern_id, "submitted", {
+                "content_id": cid,
+                "time_taken": time_taken
+            })
 
         # 6) clear timer
         timer_ph.empty()
@@ -2,11 +2,18 @@
 import streamlit as st
 import streamlit.components.v1 as components
 from datetime import datetime, timezone
+import os
+import sys
 import time
 import random
 from pymongo import InsertOne
 from pymongo.errors import BulkWriteError
 
+# flags are written by content_validity.py at the repo root (appended, so this
+# app's own modules still win on name clashes such as app_working)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from content_validity import COLLECTION as VALIDITY_COLLECTION, refresh_validity  # noqa: E402
+
 TIMER_SECONDS = 60 * 7
 MAX_AUDITORS = 5
 
@@ -142,8 +149,10 @@ def handle_short_queue(intern_id, db):
 
 def build_candidate_queue(intern_id, qa_col, audit_col, skip_col, assign_col):
     """Build a queue of eligible content IDs"""
-    # Get all content IDs
-    all_content_ids = set(qa_col.distinct("content_id"))
+    # Get all content IDs, minus those flagged invalid (no passage or
+    # malformed short QA) so they are never assigned and skipped
+    invalid = set(qa_col.database[VALIDITY_COLLECTION].distinct("content_id", {"valid": False}))
+    all_content_ids = set(qa_col.distinct("content_id")) - invalid
     
     # Get already audited by this intern
     seen = set(audit_col.distinct("content_id", {"intern_id": intern_id}))
@@ -204,6 +213,8 @@ def skip_invalid_content(intern_id, cid, skip_col, assign_col):
         "timestamp": datetime.now(timezone.utc)
     })
     assign_col.delete_many({"content_id": cid, "intern_id": intern_id})
+    # flag the id so no one else is assigned it, as app_working.py does
+    refresh_validity(skip_col.database, [cid])
 
 def handle_timeout(intern_id, cid, skip_col, assign_col):
     """Handle timeout for content"""
@@ -0,0 +1,174 @@
+from pymongo import MongoClient
+from bson import json_util
+from datetime import datetime, timezone
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+
+# Streaming Tel_QA backup: every collection goes from a batched cursor to
+# one compressed Extended JSON lines file (one document per line,
+# mongoimport-compatible), so memory stays at one batch whatever the
+# collection size. manifest.json records per collection the document count,
+# sizes and a sha256 of the file as written.
+DB_NAME    = "Tel_QA"
+BATCH_SIZE = 1_000
+CODECS     = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+LEVELS     = {"gzip": 6, "zstd": 10}
+MANIFEST   = "manifest.json"
+
+
+class _HashingWriter:
+    """File wrapper hashing and counting the (compressed) bytes written."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+
+def _compressor(codec, out, level):
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=out, mode="wb", compresslevel=level, mtime=0)
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise SystemExit("zstd backups need the zstandard package (pip install zstandard); use --codec gzip")
+        return zstandard.ZstdCompressor(level=level).stream_writer(out, closefd=False)
+    raise ValueError(f"unknown codec {codec!r}")
+
+
+def _decompressor(codec, raw):
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    import zstandard
+    return zstandard.ZstdDecompressor().stream_reader(raw)
+
+
+def _write_lines(stream, lines):
+    if not lines:
+        return 0
+    chunk = ("\n".join(lines) + "\n").encode()
+    stream.write(chunk)
+    return len(chunk)
+
+
+def dump_collection(col, path, codec="gzip", level=None, batch_size=BATCH_SIZE):
+    """
+    Stream `col` to `path` in _id order, one relaxed Extended JSON document
+    per line, writing one cursor batch at a time. Returns its manifest entry.
+    """
+    start = time.perf_counter()
+    documents = raw_bytes = 0
+    with open(path, "wb") as raw:
+        out = _HashingWriter(raw)
+        with _compressor(codec, out, level or LEVELS[codec]) as stream:
+            lines = []
+            for doc in col.find({}, batch_size=batch_size).sort("_id", 1):
+                lines.append(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS, ensure_ascii=False))
+                if len(lines) >= batch_size:
+                    raw_bytes += _write_lines(stream, lines)
+                    documents += len(lines)
+                    lines = []
+            raw_bytes += _write_lines(stream, lines)
+            documents += len(lines)
+    return {
+        "file": os.path.basename(path),
+        "documents": documents,
+        "raw_bytes": raw_bytes,
+        "bytes": out.size,
+        "sha256": out.sha256.hexdigest(),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def backup_database(db, out_dir, codec="gzip", level=None, batch_size=BATCH_SIZE, collections=None):
+    """
+    Dump every collection of `db` (views are skipped: they are recreated by
+    their modules) into `out_dir`, then write the manifest. Returns it.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    names = collections or sorted(
+        name for name in db.list_collection_names(filter={"type": "collection"})
+        if not name.startswith("system.")
+    )
+    manifest = {
+        "database": db.name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "codec": codec,
+        "format": "relaxed extended JSON lines",
+        "collections": {},
+    }
+    for name in names:
+        path = os.path.join(out_dir, name + CODECS[codec])
+        manifest["collections"][name] = dump_collection(db[name], path, codec, level, batch_size)
+        entry = manifest["collections"][name]
+        print(f"{name:32} {entry['documents']:>9} docs {entry['bytes'] / 1e6:9.2f} MB {entry['seconds']:8.2f}s")
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify_backup(out_dir):
+    """
+    Re-read a backup against its manifest: file checksum and the number of
+    documents that decode. Returns a list of problems (empty when intact).
+    """
+    with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+    problems = []
+    for name, entry in manifest["collections"].items():
+        path = os.path.join(out_dir, entry["file"])
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as raw:
+            for block in iter(lambda: raw.read(1 << 20), b""):
+                sha256.update(block)
+        if sha256.hexdigest() != entry["sha256"]:
+            problems.append(f"{name}: checksum mismatch")
+            continue
+        documents = 0
+        with open(path, "rb") as raw, _decompressor(manifest["codec"], raw) as stream:
+            pending = b""
+            for block in iter(lambda: stream.read(1 << 20), b""):
+                pending += block
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    json_util.loads(line)
+                    documents += 1
+        if documents != entry["documents"]:
+            problems.append(f"{name}: {documents} documents, manifest says {entry['documents']}")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming compressed JSON backup of Tel_QA")
+    parser.add_argument("--out", default=None, help="backup directory (default Tel_QA_backup_<UTC timestamp>)")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="gzip")
+    parser.add_argument("--level", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--collection", action="append", dest="collections", help="only this collection (repeatable)")
+    parser.add_argument("--verify", default=None, metavar="DIR", help="check an existing backup instead of taking one")
+    args = parser.parse_args()
+
+    if args.verify:
+        problems = verify_backup(args.verify)
+        print("\n".join(problems) or "✅ backup matches its manifest")
+        raise SystemExit(1 if problems else 0)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    out_dir = args.out or f"{DB_NAME}_backup_{datetime.now(timezone.utc):%Y%m%d_%H%M%S}"
+    client = MongoClient(os.getenv("MONGO_URI"))
+    backup_database(client[DB_NAME], out_dir, args.codec, args.level, args.batch_size, args.collections)
+    print(f"✅ JSON backup written to {out_dir}")
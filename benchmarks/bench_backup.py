@@ -0,0 +1,112 @@
+"""
+Backup size, time and peak Python memory: backup.ipynb's backup_json
+(list(find()) + json.dump(indent=4) per collection) vs backup/backup.py
+streaming compressed Extended JSON lines (gzip, plus zstd when the
+zstandard package is installed).
+
+Documents are the ones in backup/Tel_QA_backup, repeated `scale` times with
+fresh _ids and served by a stand-in collection that yields them lazily the
+way a batched cursor does, so peak memory is what the backup code itself
+holds.
+
+    python benchmarks/bench_backup.py [scale]
+"""
+import contextlib
+import glob
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bson import ObjectId, json_util
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "backup"))
+import backup  # noqa: E402
+
+
+class Collection:
+    def __init__(self, docs, scale):
+        self.docs, self.scale = docs, scale
+
+    def find(self, *args, **kwargs):
+        return self
+
+    def sort(self, *args):
+        return self
+
+    def __iter__(self):
+        for _ in range(self.scale):
+            for doc in self.docs:
+                yield {**doc, "_id": ObjectId()}
+
+
+class Database:
+    name = "Tel_QA"
+
+    def __init__(self, collections):
+        self.collections = collections
+
+    def list_collection_names(self, **kwargs):
+        return list(self.collections)
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+
+def backup_json(db, out_dir):
+    """backup.ipynb's backup_json, against `db`."""
+    os.makedirs(out_dir, exist_ok=True)
+    for coll in db.list_collection_names():
+        docs = list(db[coll].find())
+        with open(f"{out_dir}/{coll}.json", "w", encoding="utf-8") as f:
+            json.dump(docs, f, default=json_util.default, ensure_ascii=False, indent=4)
+
+
+def measure(label, fn, out_dir):
+    tracemalloc.start()
+    t = time.perf_counter()
+    fn(out_dir)
+    seconds = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = sum(os.path.getsize(p) for p in glob.glob(os.path.join(out_dir, "*")) if not p.endswith(backup.MANIFEST))
+    print(f"{label:26} {size / 1e6:9.2f} MB {seconds:8.2f}s {peak / 1e6:10.1f} MB peak")
+
+
+def main(scale=10):
+    sources = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, "backup", "Tel_QA_backup", "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            docs = json_util.loads(f.read())
+        if docs:
+            sources[os.path.basename(path)[:-5]] = docs
+    db = Database({name: Collection(docs, scale) for name, docs in sources.items()})
+    print(f"{sum(len(d) for d in sources.values()) * scale:,} documents in {len(sources)} collections (x{scale})")
+    print(f"{'':26} {'size':>12} {'time':>9} {'memory':>15}")
+
+    tmp = tempfile.mkdtemp()
+    try:
+        measure("list + json.dump(indent=4)", lambda out: backup_json(db, out), os.path.join(tmp, "old"))
+        codecs = ["gzip"]
+        if importlib.util.find_spec("zstandard"):
+            codecs.append("zstd")
+        else:
+            print("(zstandard not installed: zstd skipped)")
+
+        def streaming(codec, out):
+            with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+                backup.backup_database(db, out, codec)
+        for codec in codecs:
+            measure(f"streaming {codec}", lambda out: streaming(codec, out), os.path.join(tmp, codec))
+            assert not backup.verify_backup(os.path.join(tmp, codec))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,105 @@
+"""
+QA_pairs upload throughput in documents per second.
+
+Always measured: streaming parse + validation of a synthetic JSONL file and
+the same records as one JSON array. With --uri (a scratch MongoDB server; a
+throwaway database is created and dropped) also the writes: the single
+uploader's find_one + insert_one per document vs bulk_upload's unordered
+batched upserts, and re-running the same ingest with overwrite, where the
+stored content_hash lets unchanged documents skip the write entirely.
+
+    python benchmarks/bench_bulk_upload.py [n_docs] [--uri mongodb://localhost:27017]
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import bulk_upload  # noqa: E402
+
+LEGACY_MAX = 2_000
+
+
+def make_doc(i):
+    pair = {"question": "ప్రశ్న " * 8, "answer": "సమాధానం " * 12}
+    return {
+        "content_id": str(i),
+        "metadata": {"topic": "Science", "genre": "Article", "tone": "Neutral"},
+        "questions": {"short": [pair] * 6, "medium": [pair] * 2, "long": [pair] * 2},
+    }
+
+
+def timed(label, n, fn):
+    t = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t
+    print(f"{label:38} {n:>8,} docs {dt:8.3f}s {n / dt:>12,.0f} docs/s")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n_docs", nargs="?", type=int, default=50_000)
+    parser.add_argument("--uri", default=None)
+    args = parser.parse_args()
+    n = args.n_docs
+
+    docs = [make_doc(i) for i in range(n)]
+    jsonl = "\n".join(json.dumps(d, ensure_ascii=False) for d in docs).encode()
+    array = json.dumps(docs, ensure_ascii=False).encode()
+    print(f"{n:,} docs: JSONL {len(jsonl) / 1e6:.1f} MB, JSON array {len(array) / 1e6:.1f} MB")
+
+    def parse_validate(name, payload, hashed=False):
+        ok = 0
+        for _, record in bulk_upload.iter_records(name, io.BytesIO(payload)):
+            doc, error = bulk_upload.normalise_record(record)
+            if hashed:
+                bulk_upload.content_hash(doc)
+            ok += error is None
+        assert ok == n
+    timed("parse + validate JSONL", n, lambda: parse_validate("b.jsonl", jsonl))
+    timed("parse + validate JSON array", n, lambda: parse_validate("b.json", array))
+    timed("parse + validate + hash JSONL", n, lambda: parse_validate("b.jsonl", jsonl, hashed=True))
+
+    if not args.uri:
+        print("(pass --uri to also measure writes)")
+        return
+
+    from pymongo import MongoClient
+    client = MongoClient(args.uri)
+    db = client[f"bench_bulk_upload_{os.getpid()}"]
+    try:
+        col = db["QA_pairs"]
+        col.create_index("content_id")
+        m = min(n, LEGACY_MAX)
+
+        def legacy():
+            for d in docs[:m]:
+                doc, _ = bulk_upload.normalise_record(dict(d))
+                if not col.find_one({"content_id": doc["content_id"]}):
+                    col.insert_one(doc)
+        timed("legacy find_one + insert_one", m, legacy)
+
+        def legacy_overwrite():
+            for d in docs[:m]:
+                doc, _ = bulk_upload.normalise_record(dict(d))
+                col.update_one({"content_id": doc["content_id"]}, {"$set": doc}, upsert=True)
+        timed("legacy overwrite re-run", m, legacy_overwrite)
+        col.delete_many({})
+        bulk_upload.ensure_indexes(col)
+
+        _, stats = timed("bulk_upload (new docs)", n, lambda: bulk_upload.bulk_upload(
+            col, bulk_upload.iter_records("b.jsonl", io.BytesIO(jsonl))))
+        print("   ", stats["counts"])
+        _, stats = timed("bulk_upload overwrite re-run", n, lambda: bulk_upload.bulk_upload(
+            col, bulk_upload.iter_records("b.jsonl", io.BytesIO(jsonl)), overwrite=True))
+        print("   ", stats["counts"])
+    finally:
+        client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Storage comparison: legacy per-QA-pair audit rows vs the compact
+one-document-per-submission schema, measured on the JSON backup.
+
+    python benchmarks/bench_compact_schema.py [backup_dir]
+"""
+import os
+import sys
+from collections import OrderedDict
+
+import bson
+from bson import json_util
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from compact_audits import compact_doc  # noqa: E402
+
+BACKUP_DIR = os.path.join(os.path.dirname(__file__), "..", "backup", "Tel_QA_backup")
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json_util.loads(f.read())
+
+
+def main(backup_dir=BACKUP_DIR):
+    rows = []
+    for name in ["exported_audit_logs.json", "doubt_logs.json"]:
+        rows += [r for r in load(os.path.join(backup_dir, name)) if r.get("judgment") is not None]
+
+    legacy_bytes = sum(len(bson.encode(r)) for r in rows)
+
+    groups = OrderedDict()
+    for r in rows:
+        groups.setdefault((r["content_id"], r["intern_id"]), []).append(r)
+
+    compact = []
+    for (cid, intern), items in groups.items():
+        first = items[0]
+        doc = compact_doc(
+            cid, intern, items, first["assigned_at"], first["timestamp"],
+            length=first.get("length", "short")
+        )
+        doc["_id"] = bson.ObjectId()
+        compact.append(doc)
+    compact_bytes = sum(len(bson.encode(d)) for d in compact)
+
+    print(f"judgments                : {len(rows)}")
+    print(f"legacy documents         : {len(rows)}")
+    print(f"compact documents        : {len(compact)}")
+    print(f"legacy BSON bytes        : {legacy_bytes:,}")
+    print(f"compact BSON bytes       : {compact_bytes:,}")
+    print(f"storage reduction        : {1 - compact_bytes / legacy_bytes:.1%}")
+    print(f"(content,intern) index entries: {len(rows)} -> {len(compact)}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
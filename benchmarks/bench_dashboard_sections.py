@@ -0,0 +1,134 @@
+"""
+Admin dashboard cold start and per-interaction time: the previous
+single-page layout (every section rendered on every rerun, pandas/plotly
+imported up front) vs the sectioned page with deferred imports.
+
+Each variant runs in a fresh interpreter via streamlit's AppTest against an
+in-memory mongomock database seeded with a stored snapshot, doubts and a
+daily quality series, so only page-side cost is measured.
+
+    python benchmarks/bench_dashboard_sections.py [old_page.py]
+
+old_page.py defaults to admin_dashboard.py as it was just before this
+benchmark was added.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY = ["pandas", "plotly.express", "pyarrow"]
+INTERNS = 40
+DOUBTS = 2_000
+RUNS = 5
+
+
+def seed(db):
+    import analytics
+    import daily_quality
+    from datetime import datetime, timedelta, timezone
+
+    now = datetime.now(timezone.utc)
+    interns = [f"intern{i:02d}@example.org" for i in range(INTERNS)]
+    db["doubt_logs"].insert_many([
+        {"content_id": i // 5, "qa_index": i % 5, "intern_id": interns[i % INTERNS],
+         "question": "q", "answer": "a", "judgment": "Doubt",
+         "timestamp": now - timedelta(minutes=i)}
+        for i in range(DOUBTS)
+    ])
+    db[daily_quality.COLLECTION].insert_many([
+        {"intern_id": intern, "day": (now - timedelta(days=d)).strftime("%Y-%m-%d"),
+         "judged": 50, "doubts": 2, "submissions": 10, "time_hist": {"45": 4, "60": 6},
+         "rated": 40, "matches": 34, "updated_at": now}
+        for intern in interns for d in range(30)
+    ])
+    snap = {
+        "created_at": now, "window": None, "build_seconds": 1.0,
+        "overview": {"total_content_ids": 10_000, "completed": 4_000, "judgments": 100_000, "active_interns": INTERNS},
+        "quality": {"avg_kappa": 0.61, "low_agreement": 900, "corpus_kappa": 0.58,
+                    "final_pairs": 15_000, "milestone_pairs": 16_000, "krippendorff_alpha": 0.57},
+        "judgment_distribution": [{"Judgment": "Correct", "Count": 70_000}, {"Judgment": "Incorrect", "Count": 30_000}],
+        "kappa_histogram": [{"fleiss_kappa": k / 10, "pairs": 100 + k} for k in range(-3, 11)],
+        "leaderboard": [
+            {"Intern ID": i, "Valid Pairs": 2_500, "Correct Given": 1_800, "Incorrect Given": 700,
+             "Content Audited": 500, "Doubts Raised": 50, "Quality (%)": 85.0} for i in interns
+        ],
+        "alpha_by_intern": [
+            {"Intern ID": i, "Judgments": 2_500, "Disagreement": 0.2, "Share (%)": 2.5, "Alpha Without": 0.57}
+            for i in interns
+        ],
+        "doubts_per_intern": [{"Intern ID": i, "Doubts Raised": DOUBTS // INTERNS} for i in interns],
+    }
+    snap["versions"] = analytics.source_versions(db)
+    db["dashboard_snapshots"].insert_one(snap)
+
+
+def child(page):
+    """Runs in a fresh interpreter; prints one JSON line of timings."""
+    t0 = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    import mongomock
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    import analytics
+
+    db = mongomock.MongoClient(tz_aware=True)["Tel_QA"]
+    seed(db)
+    analytics.get_db = lambda: db
+    base = {m for m in HEAVY if m in sys.modules}
+
+    at = AppTest.from_file(page, default_timeout=60)
+    t1 = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - t0
+    first_run = time.perf_counter() - t1
+    loaded = sorted(m for m in HEAVY if m in sys.modules and m not in base)
+    assert not at.exception, at.exception
+
+    # the interaction: pick another intern in the doubt panel
+    if at.radio:
+        at.radio(key="section").set_value("⚠️ Doubts").run()
+    timings = []
+    for i in range(RUNS):
+        t = time.perf_counter()
+        at.selectbox(key="doubt_intern").set_value(f"intern{i:02d}@example.org").run()
+        timings.append(time.perf_counter() - t)
+        assert not at.exception, at.exception
+    st.cache_resource.clear()
+    print(json.dumps({"cold": cold, "first_run": first_run, "loaded": loaded,
+                      "interaction": sorted(timings)[len(timings) // 2]}))
+
+
+def run_child(page):
+    out = subprocess.run([sys.executable, __file__, "--child", page],
+                         capture_output=True, text=True, cwd=ROOT, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(old_page=None):
+    if old_page is None:
+        added = subprocess.run(["git", "log", "--diff-filter=A", "--format=%H", "--", "benchmarks/bench_dashboard_sections.py"],
+                               capture_output=True, text=True, cwd=ROOT, check=True).stdout.split()
+        rev = f"{added[-1]}~1" if added else "HEAD"
+        src = subprocess.run(["git", "show", f"{rev}:admin_dashboard.py"],
+                             capture_output=True, text=True, cwd=ROOT, check=True).stdout
+        old_page = os.path.join(tempfile.mkdtemp(), "admin_dashboard_old.py")
+        with open(old_page, "w") as f:
+            f.write(src)
+
+    results = {"single page": run_child(old_page),
+               "sections": run_child(os.path.join(ROOT, "admin_dashboard.py"))}
+    print(f"{'':12} {'cold start':>11} {'first run':>10} {'interaction':>12}  heavy imports on open")
+    for name, r in results.items():
+        print(f"{name:12} {r['cold']:10.3f}s {r['first_run']:9.3f}s {r['interaction']:11.3f}s  "
+              f"{', '.join(r['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2])
+    else:
+        main(*sys.argv[1:])
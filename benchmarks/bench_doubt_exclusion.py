@@ -0,0 +1,67 @@
+"""
+Doubt exclusion scaling: the old `any(...)` scan over doubt_data for every
+5-judgment pair vs analytics.kappa_frame, which masks on each pair's own
+doubt counter. Prints time per pair at growing sizes — flat means linear.
+
+    python benchmarks/bench_doubt_exclusion.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from analytics import kappa_frame  # noqa: E402
+
+RATERS = 5
+DOUBT_RATE = 0.05
+LEGACY_MAX = 8_000
+
+
+def make_rows(n_pairs, rng):
+    correct = rng.binomial(RATERS, 0.7, n_pairs)
+    doubt = (rng.random(n_pairs) < DOUBT_RATE).astype(int)
+    return [
+        {"content_id": i // 5, "qa_index": i % 5,
+         "correct": int(c), "incorrect": int(RATERS - c), "doubt": int(d)}
+        for i, (c, d) in enumerate(zip(correct, doubt))
+    ]
+
+
+def legacy_exclusion(rows):
+    doubt_data = [
+        {"content_id": r["content_id"], "qa_index": r["qa_index"]}
+        for r in rows for _ in range(r["doubt"])
+    ]
+    kept = 0
+    for r in rows:
+        cid, qidx = r["content_id"], r["qa_index"]
+        if any(d["qa_index"] == qidx and d["content_id"] == cid for d in doubt_data):
+            continue
+        kept += 1
+    return kept
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'pairs':>10} {'legacy µs/pair':>15} {'kappa_frame µs/pair':>20}")
+    for n in [1_000, 2_000, 4_000, 8_000, 100_000, 400_000, 1_600_000]:
+        rows = make_rows(n, rng)
+        new_s, (df, _) = timed(kappa_frame, rows)
+        legacy = "-"
+        if n <= LEGACY_MAX:
+            old_s, kept = timed(legacy_exclusion, rows)
+            assert kept == len(df)
+            legacy = f"{old_s / n * 1e6:15.2f}"
+        print(f"{n:>10,} {legacy:>15} {new_s / n * 1e6:20.3f}")
+
+
+if __name__ == "__main__":
+    main()
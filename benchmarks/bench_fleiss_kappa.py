@@ -0,0 +1,64 @@
+"""
+Per-QA-pair Fleiss' kappa: statsmodels called once per pair (the old
+dashboard loop) vs the vectorised kernel in agreement_metrics.
+
+    python benchmarks/bench_fleiss_kappa.py [n_judgments]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from statsmodels.stats.inter_rater import fleiss_kappa as sm_fleiss_kappa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from agreement_metrics import per_item_fleiss_kappa, fleiss_kappa, majority_index  # noqa: E402
+
+RATERS = 5
+LOOP_SAMPLE = 20_000
+
+
+def legacy(counts):
+    """The dashboards' original per-pair loop body."""
+    kappas, majorities = [], []
+    for c, i in counts:
+        matrix = np.array([[c, i]])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            kappa = sm_fleiss_kappa(matrix)
+        if np.isnan(kappa) and (matrix[0][0] == RATERS or matrix[0][1] == RATERS):
+            kappa = 1.0
+        kappas.append(kappa)
+        majorities.append(0 if matrix[0][0] > matrix[0][1] else 1)
+    return np.array(kappas), np.array(majorities)
+
+
+def main(n_judgments=1_000_000):
+    n_items = int(n_judgments) // RATERS
+    rng = np.random.default_rng(0)
+    correct = rng.binomial(RATERS, rng.uniform(0, 1, n_items))
+    counts = np.column_stack([correct, RATERS - correct])
+
+    sample = counts[:LOOP_SAMPLE]
+    t0 = time.perf_counter()
+    old_k, old_m = legacy(sample)
+    loop_s = (time.perf_counter() - t0) * n_items / len(sample)
+
+    t0 = time.perf_counter()
+    new_k = per_item_fleiss_kappa(counts)
+    new_m = majority_index(counts)
+    corpus = fleiss_kappa(counts)
+    vec_s = time.perf_counter() - t0
+
+    assert np.allclose(np.round(old_k, 4), np.round(new_k[:LOOP_SAMPLE], 4), equal_nan=True)
+    assert (old_m == new_m[:LOOP_SAMPLE]).all()
+    assert np.isclose(corpus, sm_fleiss_kappa(counts))
+
+    print(f"QA pairs                 : {n_items:,} ({n_items * RATERS:,} judgments)")
+    print(f"statsmodels loop (est.)  : {loop_s:8.2f} s")
+    print(f"vectorised kernel        : {vec_s:8.4f} s")
+    print(f"speed-up                 : {loop_s / vec_s:,.0f}x")
+    print(f"corpus kappa             : {corpus:.4f} (matches statsmodels)")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
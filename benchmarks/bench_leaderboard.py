@@ -0,0 +1,91 @@
+"""
+Leaderboard pipeline against a scratch MongoDB server (a throwaway database
+is created and dropped): first a correctness check — an intern whose only
+judgment misses the majority but who raised doubts must score 0%, one who
+matches it 100% — then the time to build the leaderboard over a seeded
+history.
+
+    python benchmarks/bench_leaderboard.py --uri mongodb://localhost:27017 [--judgments 200000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import analytics  # noqa: E402
+
+INTERNS = 40
+PAIRS_PER_CONTENT = 6
+
+
+def agreement_row(cid, qa_index, majority, now):
+    correct = 5 if majority == "Correct" else 0
+    return {"content_id": cid, "qa_index": qa_index, "n": 5, "doubt": 0, "kappa": 1.0,
+            "correct": correct, "incorrect": 5 - correct, "majority": majority, "updated_at": now}
+
+
+def check(db):
+    now = datetime.now(timezone.utc)
+    db["qa_agreement"].insert_one(agreement_row(1, 0, "Correct", now))
+    db["audit_logs"].insert_many([
+        {"intern_id": "doubter", "content_id": 1, "qa_index": 0, "judgment": "Incorrect", "timestamp": now},
+        {"intern_id": "agreer", "content_id": 1, "qa_index": 0, "judgment": "Correct", "timestamp": now},
+    ])
+    db["doubt_logs"].insert_many([
+        {"intern_id": "doubter", "content_id": 1, "qa_index": i, "judgment": "Doubt", "timestamp": now}
+        for i in range(1, 4)
+    ])
+    board = analytics.compute_leaderboard(db).set_index("Intern ID")
+    assert board.loc["doubter", "Quality (%)"] == 0, board
+    assert board.loc["doubter", "Doubts Raised"] == 3, board
+    assert board.loc["agreer", "Quality (%)"] == 100, board
+    print("check: doubts do not count as majority matches ✓")
+
+
+def seed(db, n):
+    now = datetime.now(timezone.utc)
+    contents = n // (PAIRS_PER_CONTENT * 5)
+    db["qa_agreement"].insert_many([
+        agreement_row(c, q, random.choice(["Correct", "Incorrect"]), now)
+        for c in range(contents) for q in range(PAIRS_PER_CONTENT)
+    ])
+    rows = [
+        {"intern_id": f"intern{random.randrange(INTERNS):02d}", "content_id": c, "qa_index": q,
+         "judgment": random.choice(["Correct", "Incorrect"]), "timestamp": now - timedelta(minutes=i)}
+        for i, (c, q) in enumerate((c, q) for c in range(contents) for q in range(PAIRS_PER_CONTENT) for _ in range(5))
+    ]
+    db["audit_logs"].insert_many(rows)
+    db["doubt_logs"].insert_many([{**r, "judgment": "Doubt"} for r in rows[: len(rows) // 20]])
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", required=True)
+    parser.add_argument("--judgments", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from pymongo import MongoClient
+    client = MongoClient(args.uri)
+    db = client[f"bench_leaderboard_{os.getpid()}"]
+    try:
+        analytics.ensure_indexes(db)
+        db["qa_agreement"].create_index([("content_id", 1), ("qa_index", 1)], unique=True)
+        check(db)
+        for name in ("qa_agreement", "audit_logs", "doubt_logs"):
+            db[name].delete_many({})
+        n = seed(db, args.judgments)
+        t = time.perf_counter()
+        board = analytics.compute_leaderboard(db)
+        print(f"leaderboard over {n:,} judgments: {time.perf_counter() - t:.3f}s, {len(board)} interns, "
+              f"max quality {board['Quality (%)'].max():.2f}%")
+        assert board["Quality (%)"].max() <= 100
+    finally:
+        client.drop_database(db.name)
+
+
+if __name__ == "__main__":
+    main()
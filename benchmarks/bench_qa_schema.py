@@ -0,0 +1,60 @@
+"""
+qa_schema.validate throughput on already-parsed documents, so only
+validation is timed: all-valid input (the fast path) and input where every
+tenth document has one broken pair (precise error listing), next to the
+old three-key check for scale.
+
+    python benchmarks/bench_qa_schema.py [n_docs]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import qa_schema  # noqa: E402
+
+TARGET = 100_000
+
+
+def make_doc(i, broken=False):
+    pairs = [{"question": f"ప్రశ్న {i}.{j}", "answer": f"సమాధానం {j}"} for j in range(10)]
+    if broken:
+        pairs[7] = {"question": "ప్రశ్న", "answer": ""}
+    return {
+        "content_id": str(i),
+        "metadata": {"topic": "Science", "genre": "Article", "tone": "Neutral"},
+        "questions": {"short": pairs[:6], "medium": pairs[6:8], "long": pairs[8:]},
+    }
+
+
+def old_check(data):
+    return {"content_id", "metadata", "questions"}.issubset(data.keys())
+
+
+def timed(label, docs, fn):
+    t = time.perf_counter()
+    for d in docs:
+        fn(d)
+    dt = time.perf_counter() - t
+    rate = len(docs) / dt
+    print(f"{label:34} {len(docs):>8,} docs {dt:7.3f}s {rate:>12,.0f} docs/s")
+    return rate
+
+
+def main(n=200_000):
+    valid = [make_doc(i) for i in range(n)]
+    mixed = [make_doc(i, broken=i % 10 == 0) for i in range(n)]
+    assert all(not qa_schema.validate(d)[1] for d in valid[:1000])
+    assert qa_schema.validate(mixed[0])[1] == ["questions.medium[1].answer: must not be empty"]
+    # non-ASCII digits pass str.isdigit() but are not ids
+    assert qa_schema.validate({**valid[0], "content_id": "²"})[1] == ["content_id: expected an integer or digit string, got str"]
+    assert qa_schema.validate_content({"content_id": "٣", "content_text": "x"})[1] == ["content_id: expected an integer or digit string, got str"]
+
+    timed("old key check", valid, old_check)
+    rate = timed("validate, all valid", valid, qa_schema.validate)
+    timed("validate, 10% invalid", mixed, qa_schema.validate)
+    print(f"target {TARGET:,} docs/s: {'met' if rate >= TARGET else 'NOT met'}")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
@@ -0,0 +1,275 @@
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+import streamlit as st
+from bson import json_util
+from datetime import datetime, timezone
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+import content_validity
+import qa_schema
+
+# Bulk QA_pairs / Content ingest: stream records out of JSONL / JSON array /
+# ZIP files, validate them, and upsert them in unordered batches keyed on
+# content_id. Each stored document carries a hash of its fields, so a record
+# identical to what is stored is skipped without a write. Every record gets
+# a result row, so a bad line never hides behind a good batch.
+BATCH_SIZE  = 1_000
+CHUNK_SIZE  = 1 << 20
+EXTENSIONS  = (".jsonl", ".ndjson", ".json")
+HASH_FIELD  = "content_hash"
+UNHASHED    = ("_id", "uploaded_at", HASH_FIELD)
+KINDS       = {
+    "qa":      ("QA_pairs", qa_schema.validate),
+    "content": ("Content", qa_schema.validate_content),
+}
+
+# Extended JSON aware, so mongoexport / backup dumps ({"$numberInt": ...})
+# load as the same BSON types they came from
+_decoder = json.JSONDecoder(object_hook=json_util.object_hook)
+
+
+def iter_jsonl(fp, name):
+    """
+    Yield (ref, record) per non-blank line; a line that fails to parse
+    yields (ref, exception) and the next line is read as usual.
+    """
+    for line_no, line in enumerate(io.TextIOWrapper(fp, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        ref = f"{name}:{line_no}"
+        try:
+            yield ref, _decoder.decode(line)
+        except ValueError as e:
+            yield ref, e
+
+
+def iter_json_stream(fp, name, chunk_size=CHUNK_SIZE):
+    """
+    Yield (ref, record) for a JSON array of objects — or a single object, or
+    objects simply concatenated — reading `chunk_size` characters at a time,
+    so only one record is ever held decoded. A syntax error ends the file
+    with one (ref, exception) item, since there is no reliable resync point.
+    """
+    text = io.TextIOWrapper(fp, encoding="utf-8-sig")
+    buf, pos, index, eof = "", 0, 0, False
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,[]":
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                return
+            buf, pos = text.read(chunk_size), 0
+            eof = not buf
+            continue
+        try:
+            record, end = _decoder.raw_decode(buf, pos)
+        except ValueError as e:
+            if not eof:
+                more = text.read(chunk_size)
+                buf, pos, eof = buf[pos:] + more, 0, not more
+                continue
+            yield f"{name}[{index}]", e
+            return
+        if end == len(buf) and not eof:
+            # a number or literal could continue in the next chunk
+            more = text.read(chunk_size)
+            buf, pos, eof = buf[pos:] + more, 0, not more
+            continue
+        yield f"{name}[{index}]", record
+        index += 1
+        pos = end
+
+
+def iter_records(name, fp):
+    """
+    (ref, record-or-exception) for every record in an uploaded file: JSONL
+    by line, .json as a stream, .zip member by member.
+    """
+    lower = name.lower()
+    if lower.endswith(".zip"):
+        with zipfile.ZipFile(fp) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith(EXTENSIONS):
+                    continue
+                with archive.open(member) as inner:
+                    yield from iter_records(f"{name}/{member.filename}", inner)
+    elif lower.endswith((".jsonl", ".ndjson")):
+        yield from iter_jsonl(fp, name)
+    else:
+        yield from iter_json_stream(fp, name)
+
+
+def normalise_record(data, validate=qa_schema.validate):
+    """
+    (doc, None) ready to upsert, or (None, error message) naming every
+    schema problem `validate` found.
+    """
+    doc, errors = validate(data)
+    return doc, "; ".join(errors) or None
+
+
+def content_hash(doc):
+    """
+    Stable hash of a document's fields: key order, _id and bookkeeping
+    (uploaded_at, the hash itself) do not affect it.
+    """
+    body = {k: v for k, v in doc.items() if k not in UNHASHED}
+    text = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=json_util.default)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def ensure_indexes(col):
+    # covers the per-batch lookup of stored hashes
+    col.create_index([("content_id", 1), (HASH_FIELD, 1)])
+
+
+def upsert_op(doc, overwrite):
+    """
+    Keyed on content_id. overwrite replaces the stored fields; otherwise an
+    existing content_id is left untouched ($setOnInsert), like the single
+    upload's "already exists" path.
+    """
+    update = {"$set": doc} if overwrite else {"$setOnInsert": doc}
+    return UpdateOne({"content_id": doc["content_id"]}, update, upsert=True)
+
+
+def write_batch(col, batch, overwrite):
+    """
+    Fill in the status of every (report row, doc) in `batch`. One indexed
+    read fetches the stored hashes: identical documents are "unchanged" and
+    existing ones without overwrite are "exists", both without a write. The
+    rest go out in one unordered bulk_write; failed ops are reported by
+    index and the others still land. Written ids get their validity flags
+    recomputed.
+    """
+    stored = {
+        d["content_id"]: d.get(HASH_FIELD)
+        for d in col.find({"content_id": {"$in": [doc["content_id"] for _, doc in batch]}},
+                          {"_id": 0, "content_id": 1, HASH_FIELD: 1})
+    }
+    pending = []
+    for row, doc in batch:
+        cid = doc["content_id"]
+        if cid in stored and stored[cid] == doc[HASH_FIELD]:
+            row["status"] = "unchanged"
+        elif cid in stored and not overwrite:
+            row["status"] = "exists"
+        else:
+            pending.append((row, doc))
+    if not pending:
+        return
+
+    try:
+        res = col.bulk_write([upsert_op(doc, overwrite) for _, doc in pending], ordered=False)
+        upserted, errors = set(res.upserted_ids), {}
+    except BulkWriteError as e:
+        upserted = {u["index"] for u in e.details.get("upserted", [])}
+        errors = {w["index"]: w.get("errmsg", "write error") for w in e.details.get("writeErrors", [])}
+
+    matched = "updated" if overwrite else "exists"
+    for i, (row, _) in enumerate(pending):
+        row["status"] = "error" if i in errors else "inserted" if i in upserted else matched
+        row["error"] = errors.get(i)
+    content_validity.refresh_validity(
+        col.database, [row["content_id"] for row, _ in pending if row["status"] in ("inserted", "updated")]
+    )
+
+
+def bulk_upload(col, records, overwrite=False, batch_size=BATCH_SIZE, now=None, validate=qa_schema.validate):
+    """
+    Validate and upsert (ref, record) items from iter_records.
+    Returns (report rows in input order, stats) where stats has counts per
+    status, docs written and docs/s over the whole run (parse + validate +
+    hash + write).
+    """
+    now = now or datetime.now(timezone.utc)
+    start = time.perf_counter()
+    report, batch = [], []
+    for ref, record in records:
+        if isinstance(record, Exception):
+            report.append({"ref": ref, "content_id": None, "status": "invalid", "error": f"JSON: {record}"})
+            continue
+        doc, error = normalise_record(record, validate)
+        if error:
+            report.append({"ref": ref, "content_id": record.get("content_id") if isinstance(record, dict) else None,
+                           "status": "invalid", "error": error})
+            continue
+        doc[HASH_FIELD] = content_hash(doc)
+        doc["uploaded_at"] = now
+        row = {"ref": ref, "content_id": doc["content_id"], "status": None, "error": None}
+        report.append(row)
+        batch.append((row, doc))
+        if len(batch) >= batch_size:
+            write_batch(col, batch, overwrite)
+            batch = []
+    if batch:
+        write_batch(col, batch, overwrite)
+
+    seconds = time.perf_counter() - start
+    counts = {}
+    for row in report:
+        counts[row["status"]] = counts.get(row["status"], 0) + 1
+    written = counts.get("inserted", 0) + counts.get("updated", 0)
+    return report, {
+        "records": len(report),
+        "counts": counts,
+        "seconds": round(seconds, 3),
+        "docs_per_s": round(len(report) / seconds, 1) if seconds else None,
+        "written": written,
+    }
+
+
+def backfill_hashes(col, batch_size=BATCH_SIZE):
+    """
+    Stamp content_hash on stored documents that predate it, so the first
+    re-ingest after this change can already skip unchanged records.
+    Returns the number of documents stamped.
+    """
+    stamped, ops = 0, []
+    for doc in col.find({HASH_FIELD: {"$exists": False}}, batch_size=batch_size):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {HASH_FIELD: content_hash(doc)}}))
+        if len(ops) >= batch_size:
+            stamped += col.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        stamped += col.bulk_write(ops, ordered=False).modified_count
+    return stamped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-ingest QA or Content documents from JSONL / JSON array / ZIP files")
+    parser.add_argument("files", nargs="*")
+    parser.add_argument("--kind", choices=sorted(KINDS), default="qa")
+    parser.add_argument("--overwrite", action="store_true", help="replace changed documents instead of skipping existing content_ids")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--report", default=None, help="write the per-record report here (JSONL)")
+    parser.add_argument("--backfill-hashes", action="store_true", help="hash stored documents that have no content_hash yet")
+    args = parser.parse_args()
+
+    collection, validate = KINDS[args.kind]
+    client = MongoClient(st.secrets["mongo_uri"])
+    col = client["Tel_QA"][collection]
+    ensure_indexes(col)
+    if args.backfill_hashes:
+        print(f"{collection}: {backfill_hashes(col, args.batch_size)} documents hashed")
+
+    def all_records():
+        for path in args.files:
+            with open(path, "rb") as fp:
+                yield from iter_records(os.path.basename(path), fp)
+
+    if args.files:
+        report, stats = bulk_upload(col, all_records(), args.overwrite, args.batch_size, validate=validate)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                for row in report:
+                    f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        for row in report:
+            if row["status"] in ("invalid", "error"):
+                print(f"{row['ref']}: {row['status']} — {row['error']}")
+        print(stats)
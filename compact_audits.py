@@ -0,0 +1,164 @@
+from pymongo import MongoClient, UpdateOne
+import streamlit as st
+import argparse
+
+# One document per (content_id, intern_id) submission:
+# {content_id, intern_id, submission_id, assigned_at, timestamp, time_taken, length,
+#  judgments: [{qa_index, judgment}, ...]}
+# Question/answer text is NOT copied — it is referenced from QA_pairs by
+# (content_id, length, qa_index) and only joined back in by the compat views.
+SUBMISSIONS  = "audit_submissions"
+MIGRATIONS   = "migrations"
+CHUNK_SIZE   = 5000
+# QA_pairs key the compat views $lookup on, once per submission per read
+QA_LOOKUP_INDEX = [("content_id", 1)]
+
+
+def compact_doc(cid, intern_id, judgments, assigned_at, now, length="short", submission_id=None):
+    doc = {
+        "content_id": cid,
+        "intern_id": intern_id,
+        "assigned_at": assigned_at,
+        "timestamp": now,
+        "time_taken": (now - assigned_at).total_seconds(),
+        "length": length,
+        "judgments": [
+            {"qa_index": e["qa_index"], "judgment": e["judgment"]} for e in judgments
+        ],
+    }
+    if submission_id:
+        doc["submission_id"] = submission_id
+    return doc
+
+
+def ensure_indexes(db):
+    col = db[SUBMISSIONS]
+    col.create_index([("content_id", 1), ("intern_id", 1)], unique=True)
+    col.create_index([("intern_id", 1), ("content_id", 1)])
+    col.create_index([("timestamp", 1)])
+    db["QA_pairs"].create_index(QA_LOOKUP_INDEX)
+
+
+def _compat_pipeline(doubts):
+    """
+    Unwind submissions back into the legacy one-row-per-QA-pair shape,
+    re-attaching question/answer text from QA_pairs.
+    """
+    match = {"judgments.judgment": "Doubt"} if doubts else {"judgments.judgment": {"$ne": "Doubt"}}
+    return [
+        {"$lookup": {
+            "from": "QA_pairs",
+            "localField": "content_id",
+            "foreignField": "content_id",
+            "as": "qa"
+        }},
+        {"$set": {"qa_short": {"$arrayElemAt": ["$qa.questions.short", 0]}}},
+        {"$unwind": "$judgments"},
+        {"$match": match},
+        {"$set": {"pair": {"$arrayElemAt": ["$qa_short", "$judgments.qa_index"]}}},
+        {"$project": {
+            "_id": {"$concat": [
+                {"$toString": "$_id"}, ":", {"$toString": "$judgments.qa_index"}
+            ]},
+            "content_id": 1,
+            "intern_id": 1,
+            "qa_index": "$judgments.qa_index",
+            "question": "$pair.question",
+            "answer": "$pair.answer",
+            "judgment": "$judgments.judgment",
+            "timestamp": 1,
+            "assigned_at": 1,
+            "time_taken": 1,
+            "length": 1,
+            "submission_id": 1
+        }}
+    ]
+
+
+def create_compat_views(db):
+    """
+    (Re)create audit_logs_compat / doubt_logs_compat: read-only views with
+    the exact legacy field layout, for notebooks and analytics that still
+    expect audit_logs / doubt_logs rows.
+    """
+    existing = set(db.list_collection_names())
+    for name, doubts in [("audit_logs_compat", False), ("doubt_logs_compat", True)]:
+        pipeline = _compat_pipeline(doubts)
+        if name in existing:
+            db.command("collMod", name, viewOn=SUBMISSIONS, pipeline=pipeline)
+        else:
+            db.create_collection(name, viewOn=SUBMISSIONS, pipeline=pipeline)
+
+
+def _migrate_collection(db, source, chunk_size, log):
+    """
+    Fold `source` (audit_logs or doubt_logs) into audit_submissions in _id
+    order, chunk by chunk. Progress is checkpointed in `migrations`, so an
+    interrupted run resumes where it stopped; $addToSet keeps re-runs harmless.
+    """
+    src = db[source]
+    dst = db[SUBMISSIONS]
+    state_id = f"compact_audits:{source}"
+    state = db[MIGRATIONS].find_one({"_id": state_id}) or {}
+    last_id = state.get("last_id")
+    migrated = state.get("migrated", 0)
+
+    projection = {"question": 0, "answer": 0}
+    while True:
+        query = {"judgment": {"$ne": None}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        chunk = list(src.find(query, projection).sort("_id", 1).limit(chunk_size))
+        if not chunk:
+            break
+
+        ops = []
+        for d in chunk:
+            header = {
+                "assigned_at": d.get("assigned_at"),
+                "timestamp": d.get("timestamp"),
+                "time_taken": d.get("time_taken"),
+                "length": d.get("length", "short"),
+            }
+            if d.get("submission_id"):
+                header["submission_id"] = d["submission_id"]
+            ops.append(UpdateOne(
+                {"content_id": d["content_id"], "intern_id": d["intern_id"]},
+                {"$setOnInsert": header,
+                 "$addToSet": {"judgments": {"qa_index": d["qa_index"], "judgment": d["judgment"]}}},
+                upsert=True
+            ))
+        dst.bulk_write(ops, ordered=False)
+
+        last_id = chunk[-1]["_id"]
+        migrated += len(chunk)
+        db[MIGRATIONS].update_one(
+            {"_id": state_id},
+            {"$set": {"last_id": last_id, "migrated": migrated}},
+            upsert=True
+        )
+        log(f"{source}: {migrated} rows folded (last _id {last_id})")
+    return migrated
+
+
+def migrate_to_compact(db, chunk_size=CHUNK_SIZE, log=print):
+    ensure_indexes(db)
+    totals = {}
+    for source in ["audit_logs", "doubt_logs"]:
+        totals[source] = _migrate_collection(db, source, chunk_size, log)
+    create_compat_views(db)
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate audit_logs/doubt_logs to the compact submission schema")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--views-only", action="store_true", help="only (re)create the compat views")
+    args = parser.parse_args()
+
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+    if args.views_only:
+        create_compat_views(db)
+    else:
+        print(migrate_to_compact(db, args.chunk_size))
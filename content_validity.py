@@ -0,0 +1,174 @@
+from pymongo import MongoClient, UpdateOne
+import streamlit as st
+from datetime import datetime, timezone
+import argparse
+import json
+import qa_schema
+
+# One flags document per QA content_id, so the queues can leave out content
+# they cannot serve before assigning it instead of discovering it after:
+#   has_passage                 Content exists with a non-empty content_text
+#   short_ok/medium_ok/long_ok  that level is a well-formed list (or absent
+#                               for medium/long), per qa_schema
+#   metadata_ok                 topic/genre/tone present
+#   valid                       has_passage and short_ok: servable by the
+#                               short queue; False ids are excluded up front
+# Written by the batch job below and refreshed for every id an upload writes.
+COLLECTION = "content_validity"
+BATCH_SIZE = 1_000
+MAX_ERRORS = 10
+
+
+def ensure_indexes(db):
+    db[COLLECTION].create_index([("content_id", 1)], unique=True)
+    db[COLLECTION].create_index([("valid", 1), ("content_id", 1)])
+
+
+def _affects(errors, prefix):
+    return any(e.startswith(prefix) for e in errors)
+
+
+def compute_flags(cid, content, qa_doc, now):
+    """Flags document for one content_id from its Content and QA_pairs docs."""
+    text = content.get("content_text") if content else None
+    has_passage = isinstance(text, str) and text.strip() != ""
+
+    if qa_doc is None:
+        errors = ["QA_pairs: missing"]
+    else:
+        errors = qa_schema.validate(qa_doc)[1]
+    # a missing or malformed document / questions object breaks every level
+    whole = qa_doc is None or _affects(errors, "questions:") or _affects(errors, "expected")
+    levels = {
+        level: not whole and not _affects(errors, f"questions.{level}")
+        for level in qa_schema.LEVELS
+    }
+
+    reasons = []
+    if content is None:
+        reasons.append("no_content")
+    elif not has_passage:
+        reasons.append("empty_passage")
+    if qa_doc is None:
+        reasons.append("no_qa")
+    reasons += [f"{level}_invalid" for level, ok in levels.items() if not ok and qa_doc is not None]
+    metadata_ok = qa_doc is not None and not _affects(errors, "metadata")
+    if qa_doc is not None and not metadata_ok:
+        reasons.append("metadata_invalid")
+    if not has_passage:
+        errors = ["Content.content_text: missing or empty"] + errors
+
+    return {
+        "content_id": cid,
+        "has_passage": has_passage,
+        **{f"{level}_ok": ok for level, ok in levels.items()},
+        "metadata_ok": metadata_ok,
+        "valid": has_passage and levels["short"],
+        "reasons": reasons,
+        "errors": errors[:MAX_ERRORS],
+        "checked_at": now,
+    }
+
+
+def _flag_ops(db, qa_docs, content_ids, now):
+    contents = {
+        d["content_id"]: d
+        for d in db["Content"].find({"content_id": {"$in": content_ids}}, {"_id": 0, "content_id": 1, "content_text": 1})
+    }
+    return [
+        UpdateOne({"content_id": cid},
+                  {"$set": compute_flags(cid, contents.get(cid), qa_docs.get(cid), now)},
+                  upsert=True)
+        for cid in content_ids
+    ]
+
+
+def refresh_validity(db, content_ids, now=None):
+    """
+    Recompute the flags of `content_ids` from their current documents.
+    Called after uploads and when a queue still meets an invalid item.
+    Like rebuild_validity, only ids with a QA_pairs document are flagged (the
+    queues only draw from those); others lose any flags they had, so a
+    Content upload ahead of its QA does not inflate the exclusion report.
+    Returns the number of ids flagged.
+    """
+    content_ids = list(dict.fromkeys(content_ids))
+    if not content_ids:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    qa_docs = {d["content_id"]: d for d in db["QA_pairs"].find({"content_id": {"$in": content_ids}}, {"_id": 0})}
+    missing = [cid for cid in content_ids if cid not in qa_docs]
+    if missing:
+        db[COLLECTION].delete_many({"content_id": {"$in": missing}})
+    if qa_docs:
+        db[COLLECTION].bulk_write(_flag_ops(db, qa_docs, list(qa_docs), now), ordered=False)
+    return len(qa_docs)
+
+
+def rebuild_validity(db, batch_size=BATCH_SIZE):
+    """
+    Batch job: flag every QA_pairs content_id, reading QA_pairs once in
+    batches plus one Content lookup per batch, then drop flags for ids that
+    no longer exist. Returns the number of ids checked.
+    """
+    ensure_indexes(db)
+    now = datetime.now(timezone.utc)
+    checked, batch = 0, {}
+
+    def flush():
+        db[COLLECTION].bulk_write(_flag_ops(db, batch, list(batch), now), ordered=False)
+
+    for doc in db["QA_pairs"].find({}, {"_id": 0}, batch_size=batch_size):
+        batch[doc["content_id"]] = doc
+        if len(batch) >= batch_size:
+            flush()
+            checked += len(batch)
+            batch = {}
+    if batch:
+        flush()
+        checked += len(batch)
+    db[COLLECTION].delete_many({"checked_at": {"$lt": now}})
+    return checked
+
+
+def exclusion_report(db, limit=None):
+    """
+    What the queues leave out: {"excluded": n, "reasons": {reason: count},
+    "rows": [...]}, rows sorted by content_id with their reasons and first
+    errors (at most `limit` of them).
+    """
+    counts = {
+        row["_id"]: row["count"]
+        for row in db[COLLECTION].aggregate([
+            {"$match": {"valid": False}},
+            {"$unwind": "$reasons"},
+            {"$group": {"_id": "$reasons", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+        ])
+    }
+    cursor = db[COLLECTION].find(
+        {"valid": False}, {"_id": 0, "content_id": 1, "reasons": 1, "errors": 1, "checked_at": 1}
+    ).sort("content_id", 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    return {"excluded": db[COLLECTION].count_documents({"valid": False}), "reasons": counts, "rows": list(cursor)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute content validity flags and report excluded content")
+    parser.add_argument("--report-only", action="store_true", help="skip the rebuild, only report current flags")
+    parser.add_argument("--report", default=None, help="write the excluded ids here (JSONL)")
+    args = parser.parse_args()
+
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+    if not args.report_only:
+        print(f"{rebuild_validity(db)} content ids checked")
+    report = exclusion_report(db)
+    print(f"{report['excluded']} content ids excluded from the queues")
+    for reason, count in report["reasons"].items():
+        print(f"  {reason:18} {count}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            for row in report["rows"]:
+                f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
@@ -0,0 +1,300 @@
+from pymongo import MongoClient, UpdateOne
+import streamlit as st
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timezone
+from zoneinfo import ZoneInfo
+from agreement import CATEGORY_FIELDS
+
+# Per-intern daily quality series, one small document per (intern_id, day):
+#   judged / doubts / submissions      -> updated when a submission lands
+#   time_hist {edge: n}                -> time_taken counts per TIME_BUCKETS
+#                                         bucket, for an approximate median
+#                                         without a growing array
+#   rated / matches                    -> updated when a QA pair reaches
+#                                         consensus, credited to the day
+#                                         each rater judged it
+# Dashboards read a few hundred of these instead of re-joining the history.
+COLLECTION = "intern_daily_quality"
+TZ         = "Asia/Kolkata"
+REQUIRED   = 5
+# lower bucket edges (seconds) of time_hist; the last bucket is open-ended
+TIME_BUCKETS = (0, 10, 20, 30, 45, 60, 75, 90, 120, 150, 180, 240, 300, 420, 600, 900, 1200, 1800)
+
+
+def ensure_indexes(db):
+    db[COLLECTION].create_index([("intern_id", 1), ("day", 1)], unique=True)
+    db[COLLECTION].create_index([("day", 1)])
+    db[COLLECTION].create_index([("updated_at", -1)])
+
+
+def day_of(ts, tz=TZ):
+    """
+    Calendar day ("YYYY-MM-DD") of a timestamp in `tz`; naive values are UTC
+    as stored by pymongo.
+    """
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(ZoneInfo(tz)).strftime("%Y-%m-%d")
+
+
+def time_bucket(seconds):
+    """time_hist key of `seconds`: the lower edge of its TIME_BUCKETS bucket."""
+    return str(TIME_BUCKETS[max(bisect_right(TIME_BUCKETS, seconds) - 1, 0)])
+
+
+def histogram_median(hist):
+    """
+    Approximate median of a time_hist, interpolating linearly inside the
+    bucket that holds the middle submission (the open last bucket reports
+    its lower edge). None when the histogram is empty.
+    """
+    counts = [hist.get(str(edge), 0) for edge in TIME_BUCKETS]
+    half, seen = sum(counts) / 2, 0
+    if not half:
+        return None
+    for k, count in enumerate(counts):
+        if count and seen + count >= half:
+            if k + 1 == len(TIME_BUCKETS):
+                return float(TIME_BUCKETS[k])
+            return TIME_BUCKETS[k] + (TIME_BUCKETS[k + 1] - TIME_BUCKETS[k]) * (half - seen) / count
+        seen += count
+
+
+def submission_op(intern_id, entries, time_taken, now):
+    """
+    Count one submission's newly stored judgments and its time_taken into
+    the intern's bucket for today.
+    """
+    doubts = sum(1 for e in entries if e["judgment"] == "Doubt")
+    return UpdateOne(
+        {"intern_id": intern_id, "day": day_of(now)},
+        {
+            "$inc": {"judged": len(entries) - doubts, "doubts": doubts, "submissions": 1,
+                     f"time_hist.{time_bucket(time_taken)}": 1},
+            "$set": {"updated_at": now},
+        },
+        upsert=True
+    )
+
+
+def consensus_ops(rows, majorities, now, sign=1):
+    """
+    Credit every rater of the pairs in `majorities` ({qa_index: majority})
+    on the day they judged it. `rows` are that content's confident
+    judgments as dicts with intern_id, qa_index, judgment, timestamp.
+    sign=-1 takes the same credits back out.
+    """
+    buckets = defaultdict(lambda: [0, 0])
+    for row in rows:
+        majority = majorities.get(row["qa_index"])
+        if majority is None:
+            continue
+        bucket = buckets[row["intern_id"], day_of(row["timestamp"])]
+        bucket[0] += 1
+        bucket[1] += row["judgment"] == majority
+    return [
+        UpdateOne(
+            {"intern_id": intern_id, "day": day},
+            {"$inc": {"rated": sign * rated, "matches": sign * matches}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+        for (intern_id, day), (rated, matches) in buckets.items()
+    ]
+
+
+def plan_consensus(db, cid, intern_id, entries, now, compact=False, required=REQUIRED):
+    """
+    What update_for_submission needs, read before persist_submission's
+    transaction so the transaction itself only writes:
+      counters    {qa_index: {correct, incorrect, doubt}} of the submitted
+                  pairs' qa_agreement rows as they are now
+      majorities  {qa_index: majority} of the pairs this submission brings
+                  to exactly `required` confident judgments and no doubts
+      rows        every rater's confident judgment of those pairs, the
+                  submitter's included (timestamped `now`)
+    persist_submission only applies it while the counters are unchanged.
+    """
+    counters = {
+        row["qa_index"]: {field: row.get(field, 0) for field in CATEGORY_FIELDS.values()}
+        for row in db["qa_agreement"].find(
+            {"content_id": cid, "qa_index": {"$in": [e["qa_index"] for e in entries]}},
+            {"_id": 0, "qa_index": 1, **{field: 1 for field in CATEGORY_FIELDS.values()}}
+        )
+    }
+    majorities = {}
+    for e in entries:
+        row = counters.get(e["qa_index"])
+        if e["judgment"] == "Doubt" or row is None or row["doubt"] or row["correct"] + row["incorrect"] != required - 1:
+            continue
+        correct = row["correct"] + (e["judgment"] == "Correct")
+        incorrect = row["incorrect"] + (e["judgment"] == "Incorrect")
+        majorities[e["qa_index"]] = "Correct" if correct > incorrect else "Incorrect"
+    rows = []
+    if majorities:
+        rows = [r for r in rater_judgments(db, cid, list(majorities), compact) if r["intern_id"] != intern_id]
+        rows += [
+            {"intern_id": intern_id, "qa_index": e["qa_index"], "judgment": e["judgment"], "timestamp": now}
+            for e in entries if e["qa_index"] in majorities
+        ]
+    return {"counters": counters, "majorities": majorities, "rows": rows}
+
+
+def consensus_majorities(db, cid, qa_indexes, required=REQUIRED, session=None):
+    """{qa_index: majority} for those of `qa_indexes` currently at consensus."""
+    if not qa_indexes:
+        return {}
+    return {
+        row["qa_index"]: row["majority"]
+        for row in db["qa_agreement"].find(
+            {"content_id": cid, "qa_index": {"$in": qa_indexes},
+             "n": required, "doubt": 0, "kappa": {"$ne": None}},
+            {"_id": 0, "qa_index": 1, "majority": 1},
+            session=session
+        )
+    }
+
+
+def rater_judgments(db, cid, qa_indexes, compact=False, session=None):
+    """
+    Confident judgments of `cid` for the given pairs, from audit_logs or, for
+    the compact schema, from audit_submissions. Submissions excluded by
+    anomalies.py are left out, as they are from qa_agreement.
+    """
+    excluded = db["submission_flags"].distinct("intern_id", {"content_id": cid, "excluded": True}, session=session)
+    if not compact:
+        return list(db["audit_logs"].find(
+            {"content_id": cid, "qa_index": {"$in": qa_indexes}, "judgment": {"$in": ["Correct", "Incorrect"]},
+             "intern_id": {"$nin": excluded}},
+            {"_id": 0, "intern_id": 1, "qa_index": 1, "judgment": 1, "timestamp": 1},
+            session=session
+        ))
+    rows = []
+    for doc in db["audit_submissions"].find({"content_id": cid, "intern_id": {"$nin": excluded}}, session=session):
+        rows.extend(
+            {"intern_id": doc["intern_id"], "qa_index": j["qa_index"],
+             "judgment": j["judgment"], "timestamp": doc["timestamp"]}
+            for j in doc.get("judgments", [])
+            if j["qa_index"] in qa_indexes and j["judgment"] != "Doubt"
+        )
+    return rows
+
+
+def update_for_submission(db, intern_id, fresh, time_taken, now, plan, session=None):
+    """
+    Fold one submission's newly stored judgments into the daily series:
+    the submitter's counters, plus every rater's agreement for pairs this
+    submission completed, from its plan_consensus `plan`. Write-only, so it
+    adds no reads to persist_submission's transaction.
+    """
+    if not fresh:
+        return
+    ops = [submission_op(intern_id, fresh, time_taken, now)]
+    stored = {e["qa_index"] for e in fresh}
+    majorities = {q: m for q, m in plan["majorities"].items() if q in stored}
+    if majorities:
+        ops += consensus_ops(plan["rows"], majorities, now)
+    db[COLLECTION].bulk_write(ops, ordered=False, session=session)
+
+
+def rebuild_daily_quality(db, compact=False, required=REQUIRED, tz=TZ):
+    """
+    Recompute the whole series on the server from the judgment logs (the
+    compat views for the compact schema). Used for the initial backfill and
+    as a repair tool; the app keeps it current incrementally afterwards.
+    """
+    ensure_indexes(db)
+    audit, doubt = ("audit_logs_compat", "doubt_logs_compat") if compact else ("audit_logs", "doubt_logs")
+    day = {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp", "timezone": tz}}
+    db[COLLECTION].delete_many({})
+
+    # submissions: one per (intern, content, assignment), bucketed by its day
+    db[audit].aggregate([
+        {"$match": {"judgment": {"$in": ["Correct", "Incorrect"]}}},
+        {"$unionWith": {"coll": doubt, "pipeline": [{"$match": {"judgment": "Doubt"}}]}},
+        {"$group": {
+            "_id": {"i": "$intern_id", "c": "$content_id", "a": "$assigned_at"},
+            "timestamp": {"$min": "$timestamp"},
+            "time_taken": {"$first": "$time_taken"},
+            "judged": {"$sum": {"$cond": [{"$eq": ["$judgment", "Doubt"]}, 0, 1]}},
+            "doubts": {"$sum": {"$cond": [{"$eq": ["$judgment", "Doubt"]}, 1, 0]}},
+        }},
+        # time_hist key: the largest TIME_BUCKETS edge <= time_taken (none if missing)
+        {"$set": {"bucket": {"$cond": [
+            {"$eq": [{"$ifNull": ["$time_taken", None]}, None]}, None,
+            {"$toString": {"$max": {"$filter": {
+                "input": list(TIME_BUCKETS), "cond": {"$lte": ["$$this", {"$max": ["$time_taken", 0]}]}
+            }}}}
+        ]}}},
+        {"$group": {
+            "_id": {"intern_id": "$_id.i", "day": day, "bucket": "$bucket"},
+            "judged": {"$sum": "$judged"},
+            "doubts": {"$sum": "$doubts"},
+            "submissions": {"$sum": 1},
+        }},
+        {"$group": {
+            "_id": {"intern_id": "$_id.intern_id", "day": "$_id.day"},
+            "judged": {"$sum": "$judged"},
+            "doubts": {"$sum": "$doubts"},
+            "submissions": {"$sum": "$submissions"},
+            "hist": {"$push": {"k": "$_id.bucket", "v": "$submissions"}},
+        }},
+        {"$project": {
+            "_id": 0, "intern_id": "$_id.intern_id", "day": "$_id.day",
+            "judged": 1, "doubts": 1, "submissions": 1,
+            "time_hist": {"$arrayToObject": {"$filter": {"input": "$hist", "cond": {"$ne": ["$$this.k", None]}}}},
+            "rated": {"$literal": 0}, "matches": {"$literal": 0}, "updated_at": "$$NOW"
+        }},
+        {"$merge": {"into": COLLECTION, "on": ["intern_id", "day"],
+                    "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ], allowDiskUse=True)
+
+    # agreement with the majority of every pair that reached consensus,
+    # leaving out submissions excluded by anomalies.py
+    db[audit].aggregate([
+        {"$match": {"judgment": {"$in": ["Correct", "Incorrect"]}}},
+        {"$lookup": {
+            "from": "submission_flags",
+            "let": {"c": "$content_id", "i": "$intern_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$intern_id", "$$i"]},
+                    {"$eq": ["$content_id", "$$c"]}
+                ]}}},
+                {"$match": {"excluded": True}},
+                {"$project": {"_id": 1}}
+            ],
+            "as": "excluded"
+        }},
+        {"$match": {"excluded": []}},
+        {"$lookup": {
+            "from": "qa_agreement",
+            "let": {"c": "$content_id", "q": "$qa_index"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$content_id", "$$c"]},
+                    {"$eq": ["$qa_index", "$$q"]}
+                ]}}},
+                {"$match": {"n": required, "doubt": 0, "kappa": {"$ne": None}}},
+                {"$project": {"_id": 0, "majority": 1}}
+            ],
+            "as": "agree"
+        }},
+        {"$unwind": "$agree"},
+        {"$group": {
+            "_id": {"intern_id": "$intern_id", "day": day},
+            "rated": {"$sum": 1},
+            "matches": {"$sum": {"$cond": [{"$eq": ["$judgment", "$agree.majority"]}, 1, 0]}},
+        }},
+        {"$project": {"_id": 0, "intern_id": "$_id.intern_id", "day": "$_id.day",
+                      "rated": 1, "matches": 1, "updated_at": "$$NOW"}},
+        {"$merge": {"into": COLLECTION, "on": ["intern_id", "day"],
+                    "whenMatched": "merge", "whenNotMatched": "insert"}}
+    ], allowDiskUse=True)
+
+
+if __name__ == "__main__":
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+    rebuild_daily_quality(db, compact=st.secrets.get("audit_schema", "per_pair") == "compact")
+    print(f"{COLLECTION} rebuilt: {db[COLLECTION].estimated_document_count()} intern-days")
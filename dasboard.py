@@ -1,10 +1,7 @@
 # intern_dashboard.py - JNANA Intern Milestone Tracker (Gamified)
 import streamlit as st
-from pymongo import MongoClient
-import pandas as pd
-import numpy as np
-from collections import Counter
-from statsmodels.stats.inter_rater import fleiss_kappa
+import analytics
+import snapshots
 
 # === CONFIG ===
 st.set_page_config(page_title="JNANA Milestone Dashboard", layout="wide")
@@ -12,53 +9,27 @@ st.title("🎯 JNANA Intern Milestone Tracker")
 st.caption("Track our collective progress toward building India’s benchmark QA dataset.")
 
 # === MongoDB Setup ===
-client = MongoClient(st.secrets["mongo_uri"])
-db = client["Tel_QA"]
-qa_col = db["QA_pairs"]
-audit_col = db["audit_logs"]
-doubt_col = db["doubt_logs"]
+db = analytics.get_db()
 
-# === Load Data ===
-qa_data = list(qa_col.find())
-audit_data = list(audit_col.find())
-doubt_data = list(doubt_col.find())
 
-# === Stats ===
-content_ids = qa_col.distinct("content_id")
-total_ids = len(content_ids)
-unique_interns = list(set(a["intern_id"] for a in audit_data))
-total_judgments = len(audit_data)
-
-# === Completed IDs (5 interns judged)
-completed_ids = [cid for cid in content_ids if len(set(a["intern_id"] for a in audit_col.find({"content_id": cid}))) == 5]
+# === Dashboard Snapshot (refreshed in the background on data change) ===
+full_snap = snapshots.render_header(db)
+window = snapshots.select_window()
+# this page only shows the overview part of a windowed snapshot
+snap = snapshots.window_snapshot(db, window, ["overview"]) if window else full_snap
 
 # === Global Stats ===
+overview = snap["overview"]
+
 st.subheader("📦 Dataset Overview")
 c1, c2, c3, c4 = st.columns(4)
-c1.metric("Total Content IDs", total_ids)
-c2.metric("Completed", len(completed_ids))
-c3.metric("Judgments", total_judgments)
-c4.metric("Active Interns", len(unique_interns))
-
-# === Fleiss' Kappa Calculation ===
-from collections import defaultdict
-pairwise = defaultdict(lambda: defaultdict(list))
-for a in audit_data:
-    pairwise[a["content_id"]][a["qa_index"]].append(a["judgment"])
+c1.metric("Total Content IDs", overview["total_content_ids"])
+c2.metric("Completed", overview["completed"])
+c3.metric("Judgments", overview["judgments"])
+c4.metric("Active Interns", overview["active_interns"])
 
-kappa_scores = []
-for cid, pairs in pairwise.items():
-    for qidx, judgments in pairs.items():
-        if len(judgments) == 5:
-            count = Counter(judgments)
-            matrix = np.array([[count.get("Correct", 0), count.get("Incorrect", 0)]])
-            kappa = fleiss_kappa(matrix)
-            if np.isnan(kappa) and (matrix[0][0] == 5 or matrix[0][1] == 5):
-                kappa = 1.0
-            if not np.isnan(kappa):
-                kappa_scores.append(kappa)
-
-valid_pairs = sum(1 for score in kappa_scores if score >= 0.4)
+# === Valid pairs (kappa ≥ 0.4, doubts not excluded) ===
+valid_pairs = full_snap["quality"]["milestone_pairs"]
 
 # === Milestone Progress ===
 st.subheader("🎖️ Milestone Progress")
@@ -78,10 +49,22 @@ else:
 
 # === Optional: Daily Judgment Trend ===
 st.subheader("📅 Daily Judgment Trend")
-df = pd.DataFrame(audit_data)
-if not df.empty:
-    df["date"] = pd.to_datetime(df["timestamp"]).dt.date
-    trend = df.groupby("date").size()
+t1, t2 = st.columns(2)
+trend_view = t1.selectbox("View", ["Per day", "Per hour", "Per intern per day"])
+trend_tz = analytics.TIMEZONES[t2.selectbox("Time zone", list(analytics.TIMEZONES))]
+
+trend_df = analytics.judgment_trend(
+    db,
+    unit="hour" if trend_view == "Per hour" else "day",
+    tz=trend_tz,
+    by_intern=trend_view == "Per intern per day",
+    window=window
+)
+if not trend_df.empty:
+    if trend_view == "Per intern per day":
+        trend = trend_df.pivot_table(index="bucket", columns="intern_id", values="count", fill_value=0)
+    else:
+        trend = trend_df.set_index("bucket")["count"]
     st.line_chart(trend)
 else:
     st.info("No audit data yet.")
@@ -0,0 +1,91 @@
+from pymongo import MongoClient, InsertOne
+from pymongo.errors import BulkWriteError
+import streamlit as st
+import argparse
+
+KEY_FIELDS = ("intern_id", "content_id", "qa_index")
+CHUNK_SIZE = 1000
+
+
+def find_duplicate_groups(col):
+    """
+    Yield (key, [ _id, ... ]) for every (intern_id, content_id, qa_index) that
+    has more than one document. _ids come back oldest first, each paired with
+    whether the document carries a real judgment.
+    """
+    pipeline = [
+        {"$sort": {"timestamp": 1, "_id": 1}},
+        {"$group": {
+            "_id": {f: f"${f}" for f in KEY_FIELDS},
+            "docs": {"$push": {
+                "id": "$_id",
+                "judged": {"$ne": [{"$ifNull": ["$judgment", None]}, None]}
+            }},
+            "n": {"$sum": 1}
+        }},
+        {"$match": {"n": {"$gt": 1}}}
+    ]
+    for group in col.aggregate(pipeline, allowDiskUse=True):
+        yield group["_id"], group["docs"]
+
+
+def pick_keeper(docs):
+    """
+    Keep the earliest document that has a judgment (matching the first-write-
+    wins semantics of the submit upserts); fall back to the earliest overall.
+    """
+    for d in docs:
+        if d["judged"]:
+            return d["id"]
+    return docs[0]["id"]
+
+
+def dedupe_collection(col, archive_col=None, dry_run=False):
+    """
+    Remove duplicate judgments from `col`, copying every removed document into
+    `archive_col` first so nothing is lost. Returns (groups, removed).
+    """
+    groups, to_remove = 0, []
+    for _, docs in find_duplicate_groups(col):
+        groups += 1
+        keeper = pick_keeper(docs)
+        to_remove.extend(d["id"] for d in docs if d["id"] != keeper)
+
+    if dry_run:
+        return groups, len(to_remove)
+
+    removed = 0
+    for i in range(0, len(to_remove), CHUNK_SIZE):
+        chunk = to_remove[i:i + CHUNK_SIZE]
+        if archive_col is not None:
+            ops = [InsertOne(doc) for doc in col.find({"_id": {"$in": chunk}})]
+            if ops:
+                try:
+                    archive_col.bulk_write(ops, ordered=False)
+                except BulkWriteError as bwe:
+                    # re-running after a partial pass: already archived is fine
+                    if any(e.get("code") != 11000 for e in bwe.details.get("writeErrors", [])):
+                        raise
+        removed += col.delete_many({"_id": {"$in": chunk}}).deleted_count
+    return groups, removed
+
+
+def build_unique_index(col):
+    col.create_index([(f, 1) for f in KEY_FIELDS], unique=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dedupe audit/doubt judgments and build unique indexes")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    args = parser.parse_args()
+
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+
+    for name in ["audit_logs", "doubt_logs"]:
+        groups, removed = dedupe_collection(db[name], db[f"{name}_duplicates"], dry_run=args.dry_run)
+        verb = "would remove" if args.dry_run else "removed"
+        print(f"{name}: {groups} duplicate keys, {verb} {removed} documents")
+        if not args.dry_run:
+            build_unique_index(db[name])
+            print(f"{name}: unique index on {KEY_FIELDS} built")
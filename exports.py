@@ -0,0 +1,364 @@
+from pymongo import MongoClient
+import streamlit as st
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from bson import ObjectId
+from datetime import datetime
+import analytics
+import paging
+from compact_audits import SUBMISSIONS
+from daily_quality import day_of
+
+EXPORT_DIR   = "exports"
+PARQUET_DIR  = os.path.join(EXPORT_DIR, "parquet")
+BATCH_SIZE   = 500
+PARQUET_BATCH_SIZE = 50_000
+MIN_KAPPA    = 0.4
+KEEP_EXPORTS = 3      # final dataset versions kept in EXPORT_DIR per format
+
+# column -> arrow type name; "dict" columns are dictionary-encoded strings
+PARQUET_SCHEMAS = {
+    "audit_logs": {
+        "_id": "string", "content_id": "int64", "intern_id": "dict", "qa_index": "int32",
+        "question": "string", "answer": "string", "judgment": "dict",
+        "timestamp": "timestamp", "assigned_at": "timestamp", "time_taken": "float64",
+        "length": "dict",
+    },
+    "skipped_logs": {
+        "_id": "string", "content_id": "int64", "intern_id": "dict", "status": "dict",
+        "assigned_at": "timestamp", "timestamp": "timestamp",
+    },
+}
+PARQUET_SCHEMAS["doubt_logs"] = PARQUET_SCHEMAS["audit_logs"]
+
+
+def ensure_indexes(db):
+    # newest-upload probe in export_version (qa_agreement.updated_at: agreement.py)
+    db["QA_pairs"].create_index([("uploaded_at", -1)])
+
+
+def _temp_path(path):
+    """
+    A fresh temp file next to `path` for write-then-rename, unique per call so
+    concurrent exports of the same version never write into each other.
+    """
+    directory, name = os.path.split(path)
+    with tempfile.NamedTemporaryFile(dir=directory or ".", prefix=name + ".", suffix=".part", delete=False) as f:
+        return f.name
+
+
+def final_pair_query(required=5, min_kappa=MIN_KAPPA):
+    """
+    qa_agreement filter for the final dataset: exactly `required` confident
+    judgments, no doubts, kappa >= min_kappa (same rule as the admin page).
+    """
+    return {"n": required, "doubt": 0, "kappa": {"$gte": min_kappa}}
+
+
+def short_pairs(db, cids):
+    """{content_id: stored short QA list} for `cids`, in one query."""
+    return {
+        doc["content_id"]: doc.get("questions", {}).get("short", [])
+        for doc in db["QA_pairs"].find(
+            {"content_id": {"$in": list(cids)}},
+            {"_id": 0, "content_id": 1, "questions.short": 1}
+        )
+    }
+
+
+def attach_qa_text(db, rows):
+    """
+    Yield final-dataset entries for qa_agreement `rows`, fetching the
+    question/answer text for just those rows' content_ids in one query.
+    Rows whose qa_index is out of range for the stored short list are skipped.
+    """
+    shorts = short_pairs(db, {r["content_id"] for r in rows})
+    for r in rows:
+        pairs = shorts.get(r["content_id"], [])
+        if r["qa_index"] < len(pairs):
+            pair = pairs[r["qa_index"]]
+            yield {
+                "content_id": r["content_id"],
+                "qa_index": r["qa_index"],
+                "question": pair["question"],
+                "answer": pair["answer"],
+                "fleiss_kappa": round(r["kappa"], 4)
+            }
+
+
+def iter_final_pairs(db, required=5, min_kappa=MIN_KAPPA, batch_size=BATCH_SIZE):
+    """
+    Yield validated QA pairs one by one from a server-side cursor, joining
+    the question/answer text from QA_pairs one batch of content_ids at a time.
+    Memory is bounded by `batch_size`, not by the dataset.
+    """
+    cursor = db["qa_agreement"].find(
+        final_pair_query(required, min_kappa),
+        {"_id": 0, "content_id": 1, "qa_index": 1, "kappa": 1},
+        batch_size=batch_size
+    ).sort([("content_id", 1), ("qa_index", 1)])
+
+    rows = []
+    for row in cursor:
+        rows.append(row)
+        if len(rows) >= batch_size:
+            yield from attach_qa_text(db, rows)
+            rows = []
+    if rows:
+        yield from attach_qa_text(db, rows)
+
+
+def final_pairs_page(db, after=None, page_size=50, from_content_id=None, descending=False):
+    """
+    One keyset page of the final dataset for the admin preview table, ordered
+    by (content_id, qa_index) on the qa_agreement unique index.
+    Returns (entries, next_after) like paging.fetch_page.
+    """
+    query = final_pair_query()
+    if from_content_id is not None:
+        query["content_id"] = {"$lte" if descending else "$gte": from_content_id}
+    rows, next_after = paging.fetch_page(
+        db["qa_agreement"], query, ["content_id", "qa_index"],
+        after=after, descending=descending, page_size=page_size,
+        projection={"_id": 0, "kappa": 1}
+    )
+    return list(attach_qa_text(db, rows)), next_after
+
+
+def export_version(db):
+    """
+    Cache key for the final dataset: changes when agreements or QA text change.
+    """
+    return "|".join([
+        analytics.data_version(db["qa_agreement"], "updated_at"),
+        analytics.data_version(db["QA_pairs"], "uploaded_at"),
+    ])
+
+
+def write_jsonl(entries, path, compress=False):
+    """
+    Stream `entries` to `path` as JSON lines (gzip if `compress`), writing to
+    a temp file first so a half-written export is never served. Returns count.
+    """
+    tmp = _temp_path(path)
+    opener = gzip.open if compress else open
+    count = 0
+    try:
+        with opener(tmp, "wt", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str))
+                f.write("\n")
+                count += 1
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return count
+
+
+def export_final_dataset(db, directory=EXPORT_DIR, compress=False):
+    """
+    Write (or reuse) the final dataset export for the current data version.
+    Returns the file path; repeated clicks with unchanged data hit the file
+    already on disk. Only the newest KEEP_EXPORTS versions are kept.
+    """
+    os.makedirs(directory, exist_ok=True)
+    ensure_indexes(db)
+    tag = hashlib.sha1(export_version(db).encode()).hexdigest()[:12]
+    suffix = ".jsonl" + (".gz" if compress else "")
+    path = os.path.join(directory, f"final_dataset_{tag}{suffix}")
+    if not os.path.exists(path):
+        write_jsonl(iter_final_pairs(db), path, compress)
+        prune_exports(directory, suffix)
+    return path
+
+
+def prune_exports(directory, suffix, keep=KEEP_EXPORTS):
+    """Delete all but the `keep` newest final_dataset_*`suffix` files."""
+    names = [n for n in os.listdir(directory) if n.startswith("final_dataset_") and n.endswith(suffix)]
+    paths = sorted((os.path.join(directory, n) for n in names), key=os.path.getmtime, reverse=True)
+    for old in paths[keep:]:
+        try:
+            os.remove(old)
+        except FileNotFoundError:
+            pass  # pruned by a concurrent export
+
+
+def _arrow_column(values, kind):
+    import pyarrow as pa
+
+    if kind == "dict":
+        return pa.array([None if v is None else str(v) for v in values], pa.string()).dictionary_encode()
+    if kind == "timestamp":
+        # assigned_at is False in old skipped_logs rows (session state default)
+        return pa.array([v if isinstance(v, datetime) else None for v in values], pa.timestamp("ms", tz="UTC"))
+    if kind == "string":
+        return pa.array([None if v is None else str(v) for v in values], pa.string())
+    if kind in ("int64", "int32"):
+        def to_int(v):
+            try:
+                return int(v)
+            except (TypeError, ValueError):
+                return None
+        return pa.array([to_int(v) for v in values], getattr(pa, kind)())
+    return pa.array([None if v is None else float(v) for v in values], pa.float64())
+
+
+def _arrow_table(docs, schema):
+    import pyarrow as pa
+
+    columns = {name: _arrow_column([d.get(name) for d in docs], kind) for name, kind in schema.items()}
+    # partitioned by IST calendar day, like every dashboard
+    columns["date"] = pa.array([
+        day_of(d["timestamp"]) if isinstance(d.get("timestamp"), datetime) else "unknown" for d in docs
+    ], pa.string())
+    return pa.table(columns)
+
+
+def _load_watermarks(directory):
+    path = os.path.join(directory, "_watermarks.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_watermarks(directory, marks):
+    path = os.path.join(directory, "_watermarks.json")
+    tmp = _temp_path(path)
+    with open(tmp, "w") as f:
+        json.dump(marks, f, indent=2)
+    os.replace(tmp, path)
+
+
+def compact_rows(db, docs, doubts=False):
+    """
+    audit_logs (or, with doubts, doubt_logs) rows for a batch of
+    audit_submissions docs: the compat views' shape, with the QA text joined
+    in Python from one QA_pairs query instead of a $lookup per submission.
+    """
+    shorts = short_pairs(db, {d["content_id"] for d in docs})
+    rows = []
+    for d in docs:
+        pairs = shorts.get(d["content_id"], [])
+        for j in d.get("judgments", []):
+            if (j["judgment"] == "Doubt") != doubts:
+                continue
+            pair = pairs[j["qa_index"]] if j["qa_index"] < len(pairs) else {}
+            rows.append({
+                "_id": f"{d['_id']}:{j['qa_index']}",
+                "content_id": d["content_id"], "intern_id": d["intern_id"], "qa_index": j["qa_index"],
+                "question": pair.get("question"), "answer": pair.get("answer"), "judgment": j["judgment"],
+                "timestamp": d.get("timestamp"), "assigned_at": d.get("assigned_at"),
+                "time_taken": d.get("time_taken"), "length": d.get("length"),
+            })
+    return rows
+
+
+def export_collection_parquet(db, name, directory=PARQUET_DIR, batch_size=PARQUET_BATCH_SIZE, compact=False):
+    """
+    Append every `name` document newer than the stored _id watermark to a
+    date-partitioned Parquet dataset at directory/name/date=YYYY-MM-DD/.
+    Each batch becomes one file per date named after its first _id, so a
+    re-run after a crash overwrites the same files instead of duplicating.
+    With compact=True audit_logs/doubt_logs are no longer written, so their
+    rows come from audit_submissions (own watermark) via compact_rows.
+    Returns the number of rows exported.
+    """
+    import pyarrow.parquet as pq
+
+    os.makedirs(directory, exist_ok=True)
+    schema = PARQUET_SCHEMAS[name]
+    from_submissions = compact and name in ("audit_logs", "doubt_logs")
+    source, mark = (SUBMISSIONS, f"{SUBMISSIONS}:{name}") if from_submissions else (name, name)
+    marks = _load_watermarks(directory)
+    last_id = ObjectId(marks[mark]) if mark in marks else None
+    projection = None if from_submissions else {field: 1 for field in schema}
+
+    exported = 0
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        docs = list(db[source].find(query, projection).sort("_id", 1).limit(batch_size))
+        if not docs:
+            break
+        rows = compact_rows(db, docs, doubts=name == "doubt_logs") if from_submissions else docs
+        if rows:
+            pq.write_to_dataset(
+                _arrow_table(rows, schema),
+                root_path=os.path.join(directory, name),
+                partition_cols=["date"],
+                basename_template=f"part-{docs[0]['_id']}-{{i}}.parquet",
+                use_dictionary=[f for f, kind in schema.items() if kind == "dict"],
+                compression="zstd"
+            )
+        last_id = docs[-1]["_id"]
+        marks[mark] = str(last_id)
+        _save_watermarks(directory, marks)
+        exported += len(rows)
+    return exported
+
+
+def export_final_parquet(db, directory=PARQUET_DIR, batch_size=PARQUET_BATCH_SIZE):
+    """
+    Write the validated final QA set to directory/final_dataset.parquet,
+    streamed in row groups. qa_agreement rows are updated in place, so this
+    one is rewritten in full rather than appended by watermark.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "final_dataset.parquet")
+    schema = pa.schema([
+        ("content_id", pa.int64()), ("qa_index", pa.int32()),
+        ("question", pa.string()), ("answer", pa.string()), ("fleiss_kappa", pa.float64()),
+    ])
+    count = 0
+    tmp = _temp_path(path)
+    try:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            rows = []
+            for entry in iter_final_pairs(db):
+                rows.append(entry)
+                if len(rows) >= batch_size:
+                    writer.write_table(pa.Table.from_pylist(rows, schema))
+                    count += len(rows)
+                    rows = []
+            if rows:
+                writer.write_table(pa.Table.from_pylist(rows, schema))
+                count += len(rows)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return count
+
+
+def export_parquet(db, directory=PARQUET_DIR, compact=False):
+    """
+    Incremental columnar export of audit_logs, doubt_logs, skipped_logs plus
+    a fresh final_dataset.parquet. Returns {name: rows written}.
+    """
+    written = {name: export_collection_parquet(db, name, directory, compact=compact) for name in PARQUET_SCHEMAS}
+    written["final_dataset"] = export_final_parquet(db, directory)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the validated final QA dataset as JSONL, or everything as Parquet")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--parquet", action="store_true", help="incremental Parquet export of audits + final dataset")
+    parser.add_argument("--dir", default=None)
+    args = parser.parse_args()
+
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+    if args.parquet:
+        compact = st.secrets.get("audit_schema", "per_pair") == "compact"
+        print(export_parquet(db, args.dir or PARQUET_DIR, compact))
+    else:
+        print(export_final_dataset(db, args.dir or EXPORT_DIR, args.gzip))
@@ -0,0 +1,221 @@
+import sqlite3
+import threading
+import time
+from bson import json_util
+
+MAX_ATTEMPTS  = 8
+BASE_BACKOFF  = 2      # seconds; doubles per attempt
+MAX_BACKOFF   = 300
+POLL_SECONDS  = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    key             TEXT PRIMARY KEY,
+    payload         TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    created_at      REAL NOT NULL,
+    updated_at      REAL NOT NULL,
+    next_attempt_at REAL NOT NULL
+)
+"""
+
+
+def _connect(path):
+    """
+    Open the outbox database. Every caller gets its own connection so the
+    web thread and the worker thread never share one.
+    """
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.execute(_SCHEMA)
+    conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+    return conn
+
+
+def enqueue(path, key, payload):
+    """
+    Durably store a submission batch under its idempotency key.
+    Enqueueing the same key twice (double click, rerun) is a no-op.
+    Returns True if a new entry was written.
+    """
+    now = time.time()
+    conn = _connect(path)
+    try:
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO outbox "
+            "(key, payload, status, attempts, created_at, updated_at, next_attempt_at) "
+            "VALUES (?, ?, 'pending', 0, ?, ?, ?)",
+            (key, json_util.dumps(payload), now, now, now)
+        )
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def due_entries(path, limit=20):
+    """
+    Pending entries whose backoff has elapsed, oldest first.
+    """
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT key, payload, attempts FROM outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? "
+            "ORDER BY created_at LIMIT ?",
+            (time.time(), limit)
+        ).fetchall()
+        return [(r["key"], json_util.loads(r["payload"]), r["attempts"]) for r in rows]
+    finally:
+        conn.close()
+
+
+def mark_done(path, key):
+    conn = _connect(path)
+    try:
+        conn.execute(
+            "UPDATE outbox SET status = 'done', last_error = NULL, updated_at = ? WHERE key = ?",
+            (time.time(), key)
+        )
+    finally:
+        conn.close()
+
+
+def mark_attempt_failed(path, key, attempts, error):
+    """
+    Record a failed attempt. Schedules a retry with exponential backoff, or
+    parks the entry as 'failed' once MAX_ATTEMPTS is reached (it stays in the
+    outbox until someone requeues it — nothing is dropped).
+    Returns the new status.
+    """
+    now = time.time()
+    status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+    delay = min(BASE_BACKOFF * (2 ** (attempts - 1)), MAX_BACKOFF)
+    conn = _connect(path)
+    try:
+        conn.execute(
+            "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, "
+            "updated_at = ?, next_attempt_at = ? WHERE key = ?",
+            (status, attempts, error, now, now + delay, key)
+        )
+    finally:
+        conn.close()
+    return status
+
+
+def requeue(path, keys=None):
+    """
+    Move failed entries (all, or just `keys`) back to pending with a fresh
+    attempt budget. Returns the number of entries requeued.
+    """
+    now = time.time()
+    conn = _connect(path)
+    try:
+        if keys is None:
+            cur = conn.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, "
+                "updated_at = ?, next_attempt_at = ? WHERE status = 'failed'",
+                (now, now)
+            )
+        else:
+            cur = conn.executemany(
+                "UPDATE outbox SET status = 'pending', attempts = 0, "
+                "updated_at = ?, next_attempt_at = ? WHERE key = ? AND status = 'failed'",
+                [(now, now, k) for k in keys]
+            )
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def status_counts(path):
+    conn = _connect(path)
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+    finally:
+        conn.close()
+
+
+def list_entries(path, statuses=("pending", "failed"), limit=500):
+    """
+    Outbox rows (without the payload body) for the retry dashboard.
+    """
+    marks = ",".join("?" for _ in statuses)
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT key, status, attempts, last_error, created_at, updated_at, next_attempt_at "
+            f"FROM outbox WHERE status IN ({marks}) ORDER BY created_at LIMIT ?",
+            (*statuses, limit)
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def prune_done(path, older_than_seconds=7 * 24 * 3600):
+    conn = _connect(path)
+    try:
+        cur = conn.execute(
+            "DELETE FROM outbox WHERE status = 'done' AND updated_at < ?",
+            (time.time() - older_than_seconds,)
+        )
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def drain_once(path, persist, on_event=None):
+    """
+    Try to persist every due entry once. `persist(payload)` must be idempotent
+    for the same key, since an entry whose write landed but whose
+    acknowledgement was lost is retried (persist_submission is: its judgment
+    writes are upserts keyed like the unique indexes). `on_event(event, message, details)` is called for retries
+    and permanent failures (wired to log_system_event by the app).
+    Returns the number of entries persisted.
+    """
+    persisted = 0
+    for key, payload, attempts in due_entries(path):
+        try:
+            persist(payload)
+        except Exception as e:
+            attempts += 1
+            status = mark_attempt_failed(path, key, attempts, str(e))
+            if on_event:
+                on_event(
+                    "outbox_persist_failed" if status == "failed" else "outbox_persist_retry",
+                    str(e),
+                    {"key": key, "attempts": attempts,
+                     "intern_id": payload.get("intern_id"),
+                     "content_id": payload.get("cid")}
+                )
+            continue
+        mark_done(path, key)
+        persisted += 1
+    return persisted
+
+
+def start_worker(path, persist, on_event=None, poll_seconds=POLL_SECONDS):
+    """
+    Start the background thread that drains the outbox forever.
+    Call once per process (the app wraps this in st.cache_resource).
+    """
+    _connect(path).close()
+
+    def _loop():
+        while True:
+            try:
+                if not drain_once(path, persist, on_event):
+                    time.sleep(poll_seconds)
+            except Exception as e:
+                if on_event:
+                    on_event("outbox_worker_error", str(e), {})
+                time.sleep(poll_seconds)
+
+    thread = threading.Thread(target=_loop, name="submission-outbox", daemon=True)
+    thread.start()
+    return thread
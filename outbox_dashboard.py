@@ -0,0 +1,62 @@
+# outbox_dashboard.py - JNANA Submission Outbox / Retry Dashboard
+import streamlit as st
+from pymongo import MongoClient
+import pandas as pd
+from datetime import datetime, timezone
+import outbox
+
+# === CONFIG ===
+st.set_page_config(page_title="JNANA Submission Outbox", layout="wide")
+st.title("📮 Submission Outbox")
+st.caption("Judgments accepted optimistically but not yet confirmed in MongoDB.")
+
+OUTBOX_PATH = st.secrets.get("outbox_path", "submission_outbox.db")
+
+# === Status Overview ===
+counts = outbox.status_counts(OUTBOX_PATH)
+c1, c2, c3 = st.columns(3)
+c1.metric("Pending", counts.get("pending", 0))
+c2.metric("Failed", counts.get("failed", 0))
+c3.metric("Persisted", counts.get("done", 0))
+
+# === Pending / Failed Entries ===
+st.subheader("🔁 Pending & Failed Submissions")
+entries = outbox.list_entries(OUTBOX_PATH)
+if entries:
+    df = pd.DataFrame(entries)
+    for col in ["created_at", "updated_at", "next_attempt_at"]:
+        df[col] = pd.to_datetime(df[col], unit="s", utc=True)
+    st.dataframe(df, use_container_width=True)
+
+    failed_keys = [e["key"] for e in entries if e["status"] == "failed"]
+    if failed_keys:
+        selected = st.multiselect("Retry selected submissions", failed_keys)
+        r1, r2 = st.columns(2)
+        if r1.button("🔁 Retry selected", disabled=not selected):
+            n = outbox.requeue(OUTBOX_PATH, selected)
+            st.success(f"Requeued {n} submission(s).")
+            st.rerun()
+        if r2.button("🔁 Retry all failed"):
+            n = outbox.requeue(OUTBOX_PATH)
+            st.success(f"Requeued {n} submission(s).")
+            st.rerun()
+else:
+    st.info("Outbox is empty — every submission has been persisted.")
+
+# === Recent Outbox Events from system_logs ===
+st.subheader("🪵 Recent Outbox Events")
+client = MongoClient(st.secrets["mongo_uri"], serverSelectionTimeoutMS=5000)
+system_logs = client["Tel_QA"]["system_logs"]
+events = list(system_logs.find(
+    {"event": {"$in": ["outbox_persist_retry", "outbox_persist_failed", "outbox_worker_error"]}},
+    {"_id": 0}
+).sort("timestamp", -1).limit(200))
+if events:
+    st.dataframe(pd.DataFrame(events), use_container_width=True)
+else:
+    st.info("No outbox errors logged.")
+
+# === Housekeeping ===
+if st.button("🧹 Prune persisted entries older than 7 days"):
+    n = outbox.prune_done(OUTBOX_PATH)
+    st.success(f"Pruned {n} entries at {datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC.")
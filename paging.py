@@ -0,0 +1,76 @@
+import streamlit as st
+
+# Keyset ("seek") pagination: every page is an indexed range query that
+# starts just after the last row of the previous page, so page N costs the
+# same as page 1 and only `page_size` rows ever leave the server.
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def keyset_filter(sort_keys, after, descending=False):
+    """
+    Filter selecting rows strictly after `after` (a tuple of values for
+    `sort_keys`) in sort order — the lexicographic
+    (k1 > a1) OR (k1 == a1 AND k2 > a2) OR ... chain.
+    """
+    if after is None:
+        return {}
+    op = "$lt" if descending else "$gt"
+    branches = []
+    for i, key in enumerate(sort_keys):
+        branch = {k: v for k, v in zip(sort_keys[:i], after[:i])}
+        branch[key] = {op: after[i]}
+        branches.append(branch)
+    return {"$or": branches}
+
+
+def fetch_page(col, query, sort_keys, after=None, descending=False, page_size=50, projection=None):
+    """
+    One page of `col` matching `query`, ordered by `sort_keys` (the last key
+    should be unique, e.g. _id). Returns (rows, next_after); next_after is
+    None on the last page.
+    """
+    direction = -1 if descending else 1
+    seek = keyset_filter(sort_keys, after, descending)
+    full_query = {"$and": [query, seek]} if query and seek else (query or seek)
+    if projection is not None:
+        projection = {**projection, **{k: 1 for k in sort_keys}}
+
+    rows = list(
+        col.find(full_query, projection)
+        .sort([(k, direction) for k in sort_keys])
+        .limit(page_size + 1)
+    )
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_after = tuple(rows[-1].get(k) for k in sort_keys) if more else None
+    return rows, next_after
+
+
+def paginated_table(key, fetch, filters=(), page_size=50, columns=None, scope="app"):
+    """
+    Render a Prev/Next table. `fetch(after, page_size)` returns
+    (rows, next_after). The cursor stack lives in session_state under `key`
+    and resets whenever `filters` change. Pass scope="fragment" when called
+    inside an st.fragment so paging reruns only that fragment.
+    """
+    import pandas as pd
+
+    state = st.session_state.setdefault(key, {"filters": filters, "cursors": [None]})
+    if state["filters"] != filters:
+        state.update(filters=filters, cursors=[None])
+
+    rows, next_after = fetch(state["cursors"][-1], page_size)
+    df = pd.DataFrame(rows)
+    if columns is not None and not df.empty:
+        df = df[[c for c in columns if c in df.columns]]
+    st.dataframe(df, use_container_width=True)
+
+    b1, b2, b3 = st.columns([1, 1, 4])
+    if b1.button("⬅️ Prev", key=f"{key}_prev", disabled=len(state["cursors"]) == 1):
+        state["cursors"].pop()
+        st.rerun(scope=scope)
+    if b2.button("Next ➡️", key=f"{key}_next", disabled=next_after is None):
+        state["cursors"].append(next_after)
+        st.rerun(scope=scope)
+    b3.caption(f"Page {len(state['cursors'])} · {len(rows)} rows")
@@ -0,0 +1,190 @@
+import argparse
+import json
+
+# Shape of a QA_pairs document, checked at upload time so the queues never
+# assign content whose pairs they cannot render:
+#   content_id  int (digit strings are converted)
+#   metadata    {topic, genre, tone} non-empty strings
+#   questions   {short, medium, long}: lists of {question, answer} with
+#               non-empty string values; short must have at least one pair
+LEVELS          = ("short", "medium", "long")
+REQUIRED_LEVELS = ("short",)
+METADATA_FIELDS = ("topic", "genre", "tone")
+PAIR_FIELDS     = ("question", "answer")
+TOP_LEVEL       = ("content_id", "metadata", "questions")
+
+# Content documents: content_id as above plus the passage the queues show
+CONTENT_FIELDS  = ("content_id", "content_text")
+
+
+def _integer(value):
+    # Int64 from Extended JSON is an int subclass; bool is one too but is not an id
+    return isinstance(value, int) and type(value) is not bool
+
+
+def _digits(value):
+    # str.isdigit() also accepts "²" or "٣", which int() rejects or reads differently
+    return type(value) is str and value.isascii() and value.isdigit()
+
+
+def _text(value):
+    return type(value) is str and value.strip() != ""
+
+
+def _pairs_ok(pairs):
+    for pair in pairs:
+        if type(pair) is not dict:
+            return False
+        q, a = pair.get("question"), pair.get("answer")
+        if type(q) is not str or type(a) is not str or not q.strip() or not a.strip():
+            return False
+    return True
+
+
+def _fast_ok(data):
+    """
+    The common case in one pass with no allocation; False sends the record
+    through _errors for the precise messages.
+    """
+    cid = data.get("content_id")
+    if not _integer(cid) and not _digits(cid):
+        return False
+    meta = data.get("metadata")
+    if type(meta) is not dict:
+        return False
+    for field in METADATA_FIELDS:
+        if not _text(meta.get(field)):
+            return False
+    questions = data.get("questions")
+    if type(questions) is not dict:
+        return False
+    for level in LEVELS:
+        pairs = questions.get(level)
+        if pairs is None:
+            if level in REQUIRED_LEVELS:
+                return False
+            continue
+        if type(pairs) is not list or (not pairs and level in REQUIRED_LEVELS) or not _pairs_ok(pairs):
+            return False
+    return True
+
+
+def _describe(value):
+    return "null" if value is None else type(value).__name__
+
+
+def _text_error(value):
+    if type(value) is str:
+        return "must not be empty"
+    return f"expected a string, got {_describe(value)}"
+
+
+def _errors(data):
+    """Every problem in `data`, each prefixed with the path it refers to."""
+    errors = [f"{key}: missing" for key in TOP_LEVEL if key not in data]
+
+    cid = data.get("content_id")
+    if "content_id" in data and not _integer(cid) and not _digits(cid):
+        errors.append(f"content_id: expected an integer or digit string, got {_describe(cid)}")
+
+    meta = data.get("metadata")
+    if "metadata" in data:
+        if type(meta) is not dict:
+            errors.append(f"metadata: expected an object, got {_describe(meta)}")
+        else:
+            for field in METADATA_FIELDS:
+                value = meta.get(field)
+                if field not in meta:
+                    errors.append(f"metadata.{field}: missing")
+                elif not _text(value):
+                    errors.append(f"metadata.{field}: {_text_error(value)}")
+
+    questions = data.get("questions")
+    if "questions" in data:
+        if type(questions) is not dict:
+            errors.append(f"questions: expected an object, got {_describe(questions)}")
+        else:
+            for level in LEVELS:
+                pairs = questions.get(level)
+                path = f"questions.{level}"
+                if pairs is None:
+                    if level in REQUIRED_LEVELS:
+                        errors.append(f"{path}: missing")
+                    continue
+                if type(pairs) is not list:
+                    errors.append(f"{path}: expected a list, got {_describe(pairs)}")
+                    continue
+                if not pairs and level in REQUIRED_LEVELS:
+                    errors.append(f"{path}: must contain at least one pair")
+                for i, pair in enumerate(pairs):
+                    if type(pair) is not dict:
+                        errors.append(f"{path}[{i}]: expected an object, got {_describe(pair)}")
+                        continue
+                    for field in PAIR_FIELDS:
+                        value = pair.get(field)
+                        if field not in pair:
+                            errors.append(f"{path}[{i}].{field}: missing")
+                        elif not _text(value):
+                            errors.append(f"{path}[{i}].{field}: {_text_error(value)}")
+    return errors
+
+
+def validate(data):
+    """
+    (doc, []) with content_id normalised and any _id dropped, ready to
+    upsert; or (None, errors) listing every problem found.
+    """
+    if type(data) is not dict:
+        return None, [f"expected a JSON object, got {_describe(data)}"]
+    if not _fast_ok(data):
+        errors = _errors(data)
+        if errors:
+            return None, errors
+    doc = dict(data)
+    doc.pop("_id", None)
+    if type(doc["content_id"]) is str:
+        doc["content_id"] = int(doc["content_id"])
+    return doc, []
+
+
+def validate_content(data):
+    """
+    validate() for a Content document: (doc, []) or (None, errors).
+    content_text must be a non-empty string; other fields pass through.
+    """
+    if type(data) is not dict:
+        return None, [f"expected a JSON object, got {_describe(data)}"]
+    errors = [f"{key}: missing" for key in CONTENT_FIELDS if key not in data]
+    cid = data.get("content_id")
+    if "content_id" in data and not _integer(cid) and not _digits(cid):
+        errors.append(f"content_id: expected an integer or digit string, got {_describe(cid)}")
+    if "content_text" in data and not _text(data["content_text"]):
+        errors.append(f"content_text: {_text_error(data['content_text'])}")
+    if errors:
+        return None, errors
+    doc = dict(data)
+    doc.pop("_id", None)
+    if type(doc["content_id"]) is str:
+        doc["content_id"] = int(doc["content_id"])
+    return doc, []
+
+
+if __name__ == "__main__":
+    import bulk_upload
+
+    parser = argparse.ArgumentParser(description="Validate QA or Content documents without uploading them")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--kind", choices=["qa", "content"], default="qa")
+    args = parser.parse_args()
+    check = validate if args.kind == "qa" else validate_content
+
+    bad = total = 0
+    for path in args.files:
+        with open(path, "rb") as fp:
+            for ref, record in bulk_upload.iter_records(path, fp):
+                total += 1
+                errors = [f"JSON: {record}"] if isinstance(record, Exception) else check(record)[1]
+                if errors:
+                    bad += 1
+                    print(f"{ref}: {'; '.join(errors)}")
+    print(json.dumps({"records": total, "invalid": bad}))
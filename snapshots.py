@@ -0,0 +1,280 @@
+from pymongo import MongoClient
+import streamlit as st
+from datetime import datetime, timezone
+import argparse
+import logging
+import threading
+import time
+import agreement
+import analytics
+
+# Materialised dashboard datasets. One small document per refresh; the
+# dashboards render the newest one instead of recomputing from raw
+# collections on every visit.
+SNAPSHOTS        = "dashboard_snapshots"
+KEEP_SNAPSHOTS   = 20
+REFRESH_SECONDS  = 300
+LOW_AGREEMENT    = 0.4
+
+# serialises rebuilds within a process: concurrent "Refresh now" clicks and
+# the background refresher share one build instead of racing
+_build_lock = threading.Lock()
+
+
+def ensure_indexes(db):
+    db[SNAPSHOTS].create_index([("created_at", -1)])
+
+
+def _overview_part(db, window):
+    status = analytics.compute_completion_status(db)
+    overview = analytics.compute_overview(db, window)
+    return {
+        "overview": {
+            "total_content_ids": len(status["content_ids"]),
+            "completed": len(status["completed_ids"]),
+            "judgments": overview["judgments"],
+            "active_interns": overview["active_interns"],
+        },
+        "judgment_distribution": [
+            {"Judgment": k, "Count": v} for k, v in overview["judgment_distribution"].items()
+        ],
+        "doubts_per_intern": [
+            {"Intern ID": k, "Doubts Raised": v} for k, v in overview["doubts_per_intern"].items()
+        ],
+    }
+
+
+def _kappa_part(db, window):
+    kappa_df, corpus_kappa = analytics.compute_kappa_table(db, window=window)
+    milestone_df, _ = analytics.compute_kappa_table(db, exclude_doubts=False, window=window)
+    histogram = (
+        kappa_df["fleiss_kappa"].value_counts().sort_index()
+        if not kappa_df.empty else None
+    )
+    return {
+        "quality": {
+            "avg_kappa": round(float(kappa_df["fleiss_kappa"].mean()), 4) if not kappa_df.empty else None,
+            "low_agreement": int((kappa_df["fleiss_kappa"] < LOW_AGREEMENT).sum()) if not kappa_df.empty else 0,
+            "corpus_kappa": corpus_kappa,
+            "final_pairs": int((kappa_df["fleiss_kappa"] >= LOW_AGREEMENT).sum()) if not kappa_df.empty else 0,
+            "milestone_pairs": int((milestone_df["fleiss_kappa"] >= LOW_AGREEMENT).sum()) if not milestone_df.empty else 0,
+        },
+        "kappa_histogram": [
+            {"fleiss_kappa": float(k), "pairs": int(v)} for k, v in histogram.items()
+        ] if histogram is not None else [],
+    }
+
+
+def _leaderboard_part(db, window):
+    return {"leaderboard": analytics.compute_leaderboard(db, window=window).to_dict(orient="records")}
+
+
+def _alpha_part(db, window):
+    alpha, alpha_df = analytics.compute_krippendorff(db, window=window)
+    return {"quality": {"krippendorff_alpha": alpha}, "alpha_by_intern": alpha_df.to_dict(orient="records")}
+
+
+# snapshot datasets by the computation behind them; a windowed page asks
+# only for the parts its section shows
+SNAPSHOT_PARTS = {
+    "overview": _overview_part,
+    "kappa": _kappa_part,
+    "leaderboard": _leaderboard_part,
+    "alpha": _alpha_part,
+}
+
+
+def _merge(parts):
+    merged = {}
+    for part in parts:
+        for key, value in part.items():
+            if key == "quality":
+                merged["quality"] = {**merged.get("quality", {}), **value}
+            else:
+                merged[key] = value
+    return merged
+
+
+def build_snapshot(db, window=None):
+    """
+    Compute every dashboard dataset once and return it as a snapshot document.
+    With a `window`, judgment-based datasets cover only that time range;
+    content completion is always the full-history state.
+    """
+    start = time.time()
+    versions = analytics.source_versions(db)
+    datasets = _merge(build(db, window) for build in SNAPSHOT_PARTS.values())
+    return {
+        "created_at": datetime.now(timezone.utc),
+        "versions": versions,
+        "window": list(window) if window else None,
+        **datasets,
+        "build_seconds": round(time.time() - start, 3),
+    }
+
+
+def latest_snapshot(db):
+    return db[SNAPSHOTS].find_one({}, sort=[("created_at", -1)])
+
+
+def refresh_snapshot(db, force=False):
+    """
+    Build and store a new snapshot if any source collection changed since the
+    latest one (or if `force`). Returns the snapshot that is now current.
+    A caller that waited on another build in progress reuses its result.
+    """
+    requested_at = datetime.now(timezone.utc)
+    with _build_lock:
+        latest = latest_snapshot(db)
+        if latest and _created_at(latest) >= requested_at:
+            return latest
+        if not force and latest and latest.get("versions") == analytics.source_versions(db):
+            return latest
+
+        snap = build_snapshot(db)
+        db[SNAPSHOTS].insert_one(snap)
+
+        stale = [d["_id"] for d in db[SNAPSHOTS].find({}, {"_id": 1}).sort("created_at", -1).skip(KEEP_SNAPSHOTS)]
+        if stale:
+            db[SNAPSHOTS].delete_many({"_id": {"$in": stale}})
+        return snap
+
+
+def latest_or_build(db):
+    """
+    The current snapshot; builds the first one synchronously if none exists.
+    """
+    return latest_snapshot(db) or refresh_snapshot(db, force=True)
+
+
+def _created_at(snap):
+    created = snap["created_at"]
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created
+
+
+def window_snapshot(db, window, parts=tuple(SNAPSHOT_PARTS)):
+    """
+    Snapshot-shaped datasets for a time window, computed on demand (only the
+    SNAPSHOT_PARTS named in `parts`) and shared across sessions until any
+    source collection changes. No window -> the stored all-time snapshot.
+    """
+    if not window:
+        return latest_or_build(db)
+    versions = analytics.source_versions(db)
+    return _merge(
+        analytics.shared_result(("window_snapshot", part, window), versions,
+                                lambda part=part: SNAPSHOT_PARTS[part](db, window))
+        for part in parts
+    )
+
+
+def snapshot_age(snap):
+    return datetime.now(timezone.utc) - _created_at(snap)
+
+
+def log_refresh_error(db, error):
+    """
+    Default on_error of the refresher: log the traceback and record a
+    system_logs event like the apps' log_system_event (best effort), so a
+    dashboard stuck on an old snapshot shows up in the logs.
+    """
+    logging.getLogger(__name__).error("dashboard snapshot refresh failed", exc_info=error)
+    try:
+        db["system_logs"].insert_one({
+            "timestamp": datetime.now(timezone.utc),
+            "event":     "snapshot_refresh_failed",
+            "message":   f"{type(error).__name__}: {error}",
+            "details":   {}
+        })
+    except Exception:
+        pass  # best-effort only
+
+
+def start_refresher(db, interval=REFRESH_SECONDS, on_error=None):
+    """
+    Daemon thread that checks the source data versions every `interval`
+    seconds and rebuilds the snapshot only when something changed.
+    Failures go to `on_error(exception)`, by default log_refresh_error.
+    """
+    ensure_indexes(db)
+    on_error = on_error or (lambda e: log_refresh_error(db, e))
+
+    def _loop():
+        while True:
+            try:
+                refresh_snapshot(db)
+            except Exception as e:
+                on_error(e)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_loop, name="dashboard-snapshots", daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource
+def get_refresher(_db):
+    """
+    The one background refresher thread per server process, shared by every
+    dashboard page and session.
+    """
+    return start_refresher(_db)
+
+
+def select_window(tz="Asia/Kolkata", key="window"):
+    """
+    Time-window picker shared by both dashboards: a WINDOWS preset or a
+    custom calendar range in `tz`. Returns (start, end) or None for all time.
+    """
+    labels = list(analytics.WINDOWS) + ["Custom range"]
+    w1, w2 = st.columns([1, 2])
+    label = w1.selectbox("Time window", labels, key=key)
+    if label != "Custom range":
+        return analytics.window_bounds(label, tz)
+    picked = w2.date_input("Dates", value=(), key=f"{key}_dates")
+    if len(picked) != 2:
+        return None
+    return analytics.date_window(picked[0], picked[1], tz)
+
+
+def render_header(db, show_build_time=False):
+    """
+    Dashboard header shared by both pages: ensure the refresher runs, show
+    the current snapshot's age and a "Refresh now" button. Returns the snapshot.
+    """
+    get_refresher(db)
+    snap = latest_or_build(db)
+
+    s1, s2 = st.columns([4, 1])
+    age_min = int(snapshot_age(snap).total_seconds() // 60)
+    built = f", built in {snap['build_seconds']}s" if show_build_time else ""
+    s1.caption(f"🕒 Snapshot from {snap['created_at']:%Y-%m-%d %H:%M} UTC ({age_min} min ago{built})")
+    if s2.button("🔄 Refresh now"):
+        with st.spinner("Rebuilding snapshot…"):
+            refresh_snapshot(db, force=True)
+        st.rerun()
+    if agreement.backfill_needed(db, analytics.audit_schema() == "compact"):
+        st.warning("⚠️ qa_agreement does not cover older judgments yet: kappa, the leaderboard and the "
+                   "export only count judgments made since it was introduced. Run `python agreement.py` "
+                   "(rebuild_qa_agreement) to backfill.")
+    return snap
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialise dashboard datasets into dashboard_snapshots")
+    parser.add_argument("--force", action="store_true", help="rebuild even if no source data changed")
+    parser.add_argument("--loop", action="store_true", help="keep refreshing every --interval seconds")
+    parser.add_argument("--interval", type=int, default=REFRESH_SECONDS)
+    args = parser.parse_args()
+
+    client = MongoClient(st.secrets["mongo_uri"])
+    db = client["Tel_QA"]
+    ensure_indexes(db)
+    while True:
+        snap = refresh_snapshot(db, force=args.force)
+        print(f"snapshot {snap['_id']} from {snap['created_at']:%Y-%m-%d %H:%M:%S} ({snap['build_seconds']}s build)")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
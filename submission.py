@@ -0,0 +1,184 @@
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from agreement import agreement_ops
+from compact_audits import compact_doc, SUBMISSIONS
+import daily_quality
+
+
+# attempts at the transaction when qa_agreement moved under the consensus plan
+PLAN_ATTEMPTS = 3
+
+
+class StalePlan(PyMongoError):
+    """A qa_agreement row changed between plan_consensus and the transaction."""
+
+
+def submission_key(intern_id, cid, assigned_at):
+    """
+    Deterministic idempotency key for one intern's submission of one
+    assignment. The same form submitted twice maps to the same key.
+    """
+    return f"{intern_id}:{cid}:{assigned_at.isoformat()}"
+
+
+def build_judgment_ops(judgments, cid, intern_id, assigned_at, now, length="short",
+                       submission_id=None):
+    """
+    Turn the submitted form entries into (audit_ops, doubt_ops) write lists.
+    "Doubt" judgments go to doubt_logs, everything else to audit_logs.
+
+    Each op is an upsert keyed on (intern_id, content_id, qa_index) — the same
+    key as the unique indexes — with the document in $setOnInsert, so a retry,
+    double click or outbox replay matches the existing row and writes nothing.
+    """
+    time_taken = (now - assigned_at).total_seconds()
+    audit_ops, doubt_ops = [], []
+    for entry in judgments:
+        doc = {
+            "content_id": cid,
+            "intern_id": intern_id,
+            "qa_index": entry["qa_index"],
+            "question": entry["question"],
+            "answer": entry["answer"],
+            "judgment": entry["judgment"],
+            "timestamp": now,
+            "assigned_at": assigned_at,
+            "time_taken": time_taken,
+            "length": length,
+        }
+        if submission_id:
+            doc["submission_id"] = submission_id
+        op = UpdateOne(
+            {"intern_id": intern_id, "content_id": cid, "qa_index": entry["qa_index"]},
+            {"$setOnInsert": doc},
+            upsert=True
+        )
+        (doubt_ops if entry["judgment"] == "Doubt" else audit_ops).append(op)
+    return audit_ops, doubt_ops
+
+
+def supports_transactions(client):
+    """
+    Multi-document transactions need a replica set or mongos (Atlas always is);
+    a bare standalone mongod used in local dev is not.
+    """
+    return client.topology_description.topology_type_name in (
+        "ReplicaSetWithPrimary", "Sharded", "LoadBalanced"
+    )
+
+
+def _inserted(col, ops, session, errors):
+    """
+    Indexes of `ops` whose upsert inserted a row. Without a transaction a
+    failed batch still wrote its other ops, so the error is collected in
+    `errors` and what did land is returned; inside one it aborts as usual.
+    """
+    try:
+        return list(col.bulk_write(ops, ordered=False, session=session).upserted_ids)
+    except BulkWriteError as e:
+        if session is not None:
+            raise
+        errors.append(e)
+        return [u["index"] for u in e.details.get("upserted", [])]
+
+
+def persist_submission(client, db, cid, intern_id, judgments, assigned_at, now,
+                       submission_id=None, schema="per_pair"):
+    """
+    Release the reservation, write audit + doubt judgments and fold the new
+    judgments into the qa_agreement aggregates and the per-intern daily
+    quality series, all together.
+
+    On a replica set all writes commit in a single transaction, so the
+    reservation is never released without the judgments landing (and vice
+    versa). The reads the daily quality credits need happen before it
+    (daily_quality.plan_consensus), so the transaction only writes; if a
+    qa_agreement row moved in between, it aborts and is re-planned
+    (StalePlan, up to PLAN_ATTEMPTS). On a standalone server we fall back
+    to the same writes in sequence; there a failed step still releases the
+    reservation, judgments that did land still count, and the first error
+    is re-raised afterwards.
+    User-action logging is intentionally NOT done here — callers defer it.
+
+    schema="compact" stores the whole submission as one audit_submissions
+    document (see compact_audits.py) instead of one row per QA pair.
+    """
+    assign_col = db["assignment_placeholders"]
+    audit_col = db["audit_logs"]
+    doubt_col = db["doubt_logs"]
+    agree_col = db["qa_agreement"]
+
+    audit_ops, doubt_ops = build_judgment_ops(
+        judgments, cid, intern_id, assigned_at, now, submission_id=submission_id
+    )
+    audit_entries = [e for e in judgments if e["judgment"] != "Doubt"]
+    doubt_entries = [e for e in judgments if e["judgment"] == "Doubt"]
+    time_taken = (now - assigned_at).total_seconds()
+
+    def release(session=None):
+        assign_col.delete_many({"content_id": cid, "intern_id": intern_id}, session=session)
+
+    def count(entries, session=None):
+        # the plan's counters guard the rows only inside a transaction, where
+        # a miss can still be rolled back
+        ops = agreement_ops(cid, intern_id, entries, plan["counters"] if session is not None else None)
+        res = agree_col.bulk_write(ops, ordered=True, session=session)
+        if res.matched_count + res.upserted_count < len(ops):
+            raise StalePlan(f"qa_agreement changed for content {cid}")
+        daily_quality.update_for_submission(db, intern_id, entries, time_taken, now, plan, session=session)
+
+    def write_compact(session=None):
+        try:
+            res = db[SUBMISSIONS].update_one(
+                {"content_id": cid, "intern_id": intern_id},
+                {"$setOnInsert": compact_doc(
+                    cid, intern_id, judgments, assigned_at, now, submission_id=submission_id
+                )},
+                upsert=True,
+                session=session
+            )
+            if res.upserted_id is not None and judgments:
+                count(judgments, session)
+        except Exception:
+            if session is None:
+                release()
+            raise
+        release(session)
+
+    def write_all(session=None):
+        # only judgments that were actually inserted count towards agreement
+        errors, fresh = [], []
+        try:
+            if audit_ops:
+                fresh += [audit_entries[i] for i in _inserted(audit_col, audit_ops, session, errors)]
+            if doubt_ops:
+                fresh += [doubt_entries[i] for i in _inserted(doubt_col, doubt_ops, session, errors)]
+            if fresh:
+                count(fresh, session)
+        except Exception:
+            if session is None:
+                release()
+            raise
+        release(session)
+        if errors:
+            raise errors[0]
+
+    write = write_compact if schema == "compact" else write_all
+
+    def make_plan():
+        return daily_quality.plan_consensus(db, cid, intern_id, judgments, now, compact=schema == "compact")
+
+    if not supports_transactions(client):
+        plan = make_plan()
+        write()
+        return
+
+    for attempt in range(PLAN_ATTEMPTS):
+        plan = make_plan()
+        try:
+            with client.start_session() as session:
+                session.with_transaction(write)
+            return
+        except StalePlan:
+            if attempt == PLAN_ATTEMPTS - 1:
+                raise